@@ -1,28 +1,39 @@
-from flask import Flask
+from flask import Flask, request
+from .config import get_config
 from .extensions import db, cors
 
 
-def create_app() -> Flask:
-    """Application factory that initializes extensions and registers blueprints."""
+def create_app(config_name=None) -> Flask:
+    """Application factory that initializes extensions and registers blueprints.
+
+    `config_name` selects a profile from `config.CONFIGS` (default: $APP_CONFIG or development).
+    """
     app = Flask(
         __name__,
         static_folder='../static',
         template_folder='../templates',
     )
 
-    # Base config
-    app.config['TEMPLATES_AUTO_RELOAD'] = True
-    app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///patientsss.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config.from_object(get_config(config_name))
 
     # Initialize extensions
     cors.init_app(app)
     db.init_app(app)
 
-    # No-cache headers for dev
+    # Cache headers: immutable responses keep theirs, ETag'd responses must
+    # revalidate, everything else is no-store unless the profile lets static
+    # files keep their max-age
     @app.after_request
-    def add_no_cache_headers(response):
+    def add_cache_headers(response):
+        if response.cache_control.immutable or response.cache_control.public:
+            # The view chose its own caching
+            return response
+        is_static = request.endpoint == 'static'
+        if is_static and app.config['CACHE_STATIC']:
+            return response
+        if not is_static and response.headers.get('ETag'):
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
         response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
         response.headers['Pragma'] = 'no-cache'
         response.headers['Expires'] = '0'
@@ -43,13 +54,17 @@ def create_app() -> Flask:
     app.register_blueprint(patients_bp)
     app.register_blueprint(serial_bp)
 
-    # Ensure database tables exist
+    # Tune connections, then ensure database tables exist
     with app.app_context():
+        from . import database
+        database.init_app(app)
         db.create_all()
+        from .migrations import upgrade
+        upgrade()
 
-    # Register teardown hooks for services
-    from .services.camera import cleanup
-    app.teardown_appcontext(cleanup)
+    # Start group-committed vitals history
+    from .services import history
+    history.init_app(app)
 
     return app
 
@@ -1,16 +1,36 @@
-from flask import Blueprint, Response, jsonify
+import os
+from flask import Blueprint, Response, jsonify, redirect, request, send_from_directory, url_for
+from sqlalchemy import func, select, update
 from ..services import camera as cam
+from ..services import thumbnails
 from ..models import Patient
 from ..extensions import db
+from ..utils import send_immutable
 
 
 camera_bp = Blueprint('camera', __name__)
 
+# Upload names are never reused, so the redirect to an upload's thumbnail is
+# stable; kept shorter than IMMUTABLE_MAX_AGE in case the thumbnail folder is cleared
+THUMBNAIL_REDIRECT_MAX_AGE = 24 * 3600
+
 
 @camera_bp.route('/video_feed')
 def video_feed():
-    """Live video stream"""
-    return Response(cam.generate_frames(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    """Live video stream.
+
+    Optional query params: fps (max frame rate), quality (JPEG, snapped to
+    one of cam.STREAM_QUALITIES) and width (pixels, rounded up to one of
+    cam.STREAM_WIDTHS).
+    """
+    fps = request.args.get('fps', type=float)
+    profile = cam.StreamProfile.create(
+        quality=request.args.get('quality', type=int),
+        width=request.args.get('width', type=int),
+    )
+    if fps is not None and fps <= 0:
+        return jsonify({"status": "error", "message": "fps must be positive"}), 400
+    return Response(cam.generate_frames(profile, fps), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 
 @camera_bp.route('/take_picture')
@@ -19,15 +39,50 @@ def take_picture():
     filename = cam.capture_photo()
     
     if filename:
-        # Save to latest patient
+        # Save to latest patient in a single UPDATE, without loading the row
         try:
-            last_patient = Patient.query.order_by(Patient.id.desc()).first()
-            if last_patient:
-                last_patient.photo_filename = filename
-                db.session.commit()
+            latest_id = select(func.max(Patient.id)).scalar_subquery()
+            db.session.execute(
+                update(Patient).where(Patient.id == latest_id).values(photo_filename=filename),
+                execution_options={'synchronize_session': False},
+            )
+            db.session.commit()
         except Exception:
-            pass
+            db.session.rollback()
         
         return jsonify({"status": "success", "filename": filename})
     
-    return jsonify({"status": "error", "message": "Failed to capture photo"})
\ No newline at end of file
+    return jsonify({"status": "error", "message": "Failed to capture photo"})
+
+
+@camera_bp.route('/photos/<filename>')
+def photo(filename):
+    """A captured photo, served from memory until the background writer has saved it"""
+    if os.path.isfile(os.path.join(thumbnails.UPLOAD_DIR, filename)):
+        return send_from_directory(os.path.abspath(thumbnails.UPLOAD_DIR), filename)
+    jpeg = cam.pending_photo(filename)
+    if jpeg is None:
+        return jsonify({"status": "error", "message": "Photo not found"}), 404
+    return Response(jpeg, mimetype='image/jpeg')
+
+
+@camera_bp.route('/thumbnail/<filename>')
+def thumbnail(filename):
+    """Redirect to the cached thumbnail of an upload, generating it if needed"""
+    width = request.args.get('w', default=thumbnails.DEFAULT_WIDTH, type=int)
+    if width not in thumbnails.THUMB_WIDTHS:
+        return jsonify({"status": "error", "message": f"w must be one of {list(thumbnails.THUMB_WIDTHS)}"}), 400
+
+    name = thumbnails.get_thumbnail(filename, width)
+    if name is None:
+        return jsonify({"status": "error", "message": "Photo not found"}), 404
+    response = redirect(url_for('camera.thumbnail_file', name=name))
+    response.cache_control.public = True
+    response.cache_control.max_age = THUMBNAIL_REDIRECT_MAX_AGE
+    return response
+
+
+@camera_bp.route('/thumbnails/<name>')
+def thumbnail_file(name):
+    """Serve a content-addressed thumbnail with immutable cache headers"""
+    return send_immutable(thumbnails.THUMB_DIR, name)
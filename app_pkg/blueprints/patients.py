@@ -1,8 +1,8 @@
-import csv
-from io import StringIO
-from flask import Blueprint, jsonify, request, make_response
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from ..extensions import db
-from ..models import Patient, PatientHindi
+from ..models import Patient
+from ..services import importer, patients as patients_service
+from ..utils import conditional_json, parse_time
 
 
 patients_bp = Blueprint('patients', __name__)
@@ -10,71 +10,23 @@ patients_bp = Blueprint('patients', __name__)
 
 @patients_bp.route('/submit_patient_data', methods=['POST'])
 def receive_patient_data():
-    data = request.get_json()
-
-    new_patient = Patient(
-        name=data['name'],
-        age=data['age'],
-        gender=data['gender'],
-        contact=data['contact'],
-        address=data['address'],
-        chief_complaint=data['chiefComplaint'],
-        pain_level=data['painLevel'],
-        pain_description=data['painDescription'],
-        additional_symptoms=data['additionalSymptoms'],
-        medical_history=data['medicalHistory'],
-        emergency_name=data['emergencyName'],
-        emergency_relation=data['emergencyRelation'],
-        emergency_gender=data['emergencyGender'],
-        emergency_contact=data['emergencyContact'],
-        emergency_address=data['emergencyAddress'],
-        photo_filename=data.get('photoFilename'),
-        heart_rate=data.get('heart_rate'),
-        spo2=data.get('spo2'),
-        body_temperature=data.get('body_temperature'),
-        environment_temperature=data.get('environment_temperature')
-    )
-
-    try:
-        db.session.add(new_patient)
-        db.session.commit()
-        return jsonify({"status": "success", "message": "Patient + sensor data saved!"}), 200
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({"status": "error", "message": str(e)}), 400
+    return _create_patient(request.get_json(), 'en', "Patient + sensor data saved!")
 
 
 @patients_bp.route('/submit_patient_data_hi', methods=['POST'])
 def receive_patient_data_hindi():
-    data = request.get_json()
+    return _create_patient(request.get_json(), 'hi', "Patient (Hindi) + sensor data saved!")
 
-    new_patient = PatientHindi(
-        name=data['name'],
-        age=data['age'],
-        gender=data['gender'],
-        contact=data['contact'],
-        address=data['address'],
-        chief_complaint=data['chiefComplaint'],
-        pain_level=data['painLevel'],
-        pain_description=data['painDescription'],
-        additional_symptoms=data['additionalSymptoms'],
-        medical_history=data['medicalHistory'],
-        emergency_name=data['emergencyName'],
-        emergency_relation=data['emergencyRelation'],
-        emergency_gender=data['emergencyGender'],
-        emergency_contact=data['emergencyContact'],
-        emergency_address=data['emergencyAddress'],
-        photo_filename=data.get('photoFilename'),
-        heart_rate=data.get('heart_rate'),
-        spo2=data.get('spo2'),
-        body_temperature=data.get('body_temperature'),
-        environment_temperature=data.get('environment_temperature')
-    )
 
+def _create_patient(data, locale, message):
     try:
+        new_patient = patients_service.patient_from_payload(data, locale)
         db.session.add(new_patient)
         db.session.commit()
-        return jsonify({"status": "success", "message": "Patient (Hindi) + sensor data saved!"}), 200
+        return jsonify({"status": "success", "message": message}), 200
+    except KeyError as e:
+        db.session.rollback()
+        return jsonify({"status": "error", "message": f"Missing field: {e.args[0]}"}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({"status": "error", "message": str(e)}), 400
@@ -85,59 +37,151 @@ def get_patient(id):
     patient = Patient.query.get(id)
     if not patient:
         return jsonify({"message": "Patient not found"}), 404
-    return jsonify({
-        "id": patient.id,
-        "name": patient.name,
-        "age": patient.age,
-        "gender": patient.gender,
-        "contact": patient.contact,
-        "address": patient.address,
-        "chiefComplaint": patient.chief_complaint,
-        "painLevel": patient.pain_level,
-        "painDescription": patient.pain_description,
-        "additionalSymptoms": patient.additional_symptoms,
-        "medicalHistory": patient.medical_history,
-        "emergencyName": patient.emergency_name,
-        "emergencyRelation": patient.emergency_relation,
-        "emergencyGender": patient.emergency_gender,
-        "emergencyContact": patient.emergency_contact,
-        "emergencyAddress": patient.emergency_address,
-        "photoFilename": patient.photo_filename,
-        "heart_rate": patient.heart_rate,
-        "spo2": patient.spo2,
-        "body_temperature": patient.body_temperature,
-        "environment_temperature": patient.environment_temperature
-    })
+    return jsonify(patients_service.patient_to_dict(patient))
 
 
 @patients_bp.route('/patients')
 def get_patients():
-    patients = Patient.query.all()
-    return jsonify([
-        {
-            'id': p.id,
-            'name': p.name,
-            'age': p.age,
-            'gender': p.gender,
-            'contact': p.contact,
-            'address': p.address,
-            'chiefComplaint': p.chief_complaint,
-            'painLevel': p.pain_level,
-            'painDescription': p.pain_description,
-            'additionalSymptoms': p.additional_symptoms,
-            'medicalHistory': p.medical_history,
-            'emergencyName': p.emergency_name,
-            'emergencyRelation': p.emergency_relation,
-            'emergencyGender': p.emergency_gender,
-            'emergencyContact': p.emergency_contact,
-            'emergencyAddress': p.emergency_address,
-            'photoFilename': p.photo_filename,
-            'heart_rate': p.heart_rate,
-            'spo2': p.spo2,
-            'body_temperature': p.body_temperature,
-            'environment_temperature': p.environment_temperature
-        } for p in patients
-    ])
+    """List patients.
+
+    Query params (all optional): fields (comma-separated API keys), locale (en|hi|all),
+    name/contact (prefix), q (see /patients/search), from/to (intake time, epoch seconds or ISO 8601), pain_min/pain_max,
+    sort (id|name|age|timestamp), order (asc|desc), limit and cursor.
+    With limit set, the cursor for the next page is returned in X-Next-Cursor.
+    """
+    args = request.args
+    next_cursor = None
+
+    def build():
+        nonlocal next_cursor
+        page, next_cursor = patients_service.list_patients(
+            patients_service.parse_fields(args.get('fields')),
+            locale=patients_service.check_locale(args.get('locale')),
+            name_prefix=args.get('name'),
+            contact_prefix=args.get('contact'),
+            search=args.get('q'),
+            start=parse_time(args.get('from')),
+            end=parse_time(args.get('to')),
+            pain_min=args.get('pain_min', type=int),
+            pain_max=args.get('pain_max', type=int),
+            sort=args.get('sort', 'id'),
+            descending=args.get('order', 'asc').lower() == 'desc',
+            limit=args.get('limit', type=int),
+            cursor=args.get('cursor'),
+        )
+        return page
+
+    try:
+        response = conditional_json(f'patients-{patients_service.get_version()}', build)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+@patients_bp.route('/patients/import', methods=['POST'])
+def import_patients():
+    """Bulk-create patients from a JSON array (or {"patients": [...]}) of /submit_patient_data
+    payloads, NDJSON (application/x-ndjson) or CSV (text/csv) in export_csv's layout.
+
+    Optional per-row keys: locale, timestamp and vitals. Invalid rows are skipped
+    and reported by row number; the rest are still imported.
+    """
+    try:
+        if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+            rows = importer.ndjson_rows(request.stream)
+        elif request.mimetype == 'text/csv':
+            rows = importer.csv_rows(request.stream)
+        else:
+            data = request.get_json()
+            if isinstance(data, dict):
+                data = data.get('patients')
+            if not isinstance(data, list):
+                return jsonify({"status": "error", "message": "Expected a list of patient objects"}), 400
+            rows = importer.json_rows(data)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Invalid import body: {e}"}), 400
+
+    result = importer.import_rows(rows)
+    return jsonify({"status": "success", **result}), 200
+
+
+@patients_bp.route('/patients/search')
+def search_patients():
+    """Find patients by q (name or contact prefix, or words in complaint/symptoms/history),
+    name or contact (prefix). Newest first.
+
+    Also accepts fields, locale, limit (default 50) and cursor as in /patients.
+    """
+    args = request.args
+    if not any(args.get(key, '').strip() for key in ('q', 'name', 'contact')):
+        return jsonify({"status": "error", "message": "Provide q, name or contact"}), 400
+    next_cursor = None
+
+    def build():
+        nonlocal next_cursor
+        page, next_cursor = patients_service.list_patients(
+            patients_service.parse_fields(args.get('fields')),
+            locale=patients_service.check_locale(args.get('locale')),
+            name_prefix=args.get('name'),
+            contact_prefix=args.get('contact'),
+            search=args.get('q'),
+            sort='timestamp',
+            descending=True,
+            limit=args.get('limit', patients_service.SEARCH_LIMIT, type=int),
+            cursor=args.get('cursor'),
+        )
+        return page
+
+    try:
+        response = conditional_json(f'patients-{patients_service.get_version()}', build)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+@patients_bp.route('/patients/<int:patient_id>/vitals', methods=['GET'])
+def get_patient_vitals(patient_id):
+    """A patient's vital readings in time order.
+
+    Query params (all optional): from/to (epoch seconds or ISO 8601) and limit.
+    """
+    if Patient.query.get(patient_id) is None:
+        return jsonify({"message": "Patient not found"}), 404
+    try:
+        start = parse_time(request.args.get('from'))
+        end = parse_time(request.args.get('to'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    def build():
+        return patients_service.list_readings(patient_id, start, end, request.args.get('limit', type=int))
+
+    return conditional_json(f'vitals-{patient_id}-{patients_service.get_version()}', build)
+
+
+@patients_bp.route('/patients/<int:patient_id>/vitals', methods=['POST'])
+def add_patient_vitals(patient_id):
+    """Record a reading: heart_rate, spo2, body_temperature, environment_temperature and optional timestamp."""
+    if Patient.query.get(patient_id) is None:
+        return jsonify({"status": "error", "message": "Patient not found"}), 404
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"status": "error", "message": "Expected a JSON object"}), 400
+    try:
+        reading = patients_service.add_reading(patient_id, data, parse_time(data.get('timestamp')))
+        if reading is None:
+            return jsonify({"status": "error", "message": "No vitals in request"}), 400
+        db.session.commit()
+        return jsonify({"status": "success", "id": reading.id}), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"status": "error", "message": str(e)}), 400
 
 
 @patients_bp.route('/update_patient/<int:patient_id>', methods=['PUT'])
@@ -196,30 +240,20 @@ def delete_patient(patient_id):
 
 @patients_bp.route('/export_csv', methods=['GET'])
 def export_csv():
-    patients = Patient.query.all()
-    si = StringIO()
-    writer = csv.writer(si)
-    writer.writerow([
-        "ID", "Name", "Age", "Gender", "Contact", "Address",
-        "Chief Complaint", "Pain Level", "Pain Description",
-        "Additional Symptoms", "Medical History",
-        "Emergency Name", "Emergency Relation", "Emergency Gender",
-        "Emergency Contact", "Emergency Address", "Photo Filename"
-    ])
-    for p in patients:
-        writer.writerow([
-            p.id, p.name, p.age, p.gender, p.contact, p.address,
-            p.chief_complaint, p.pain_level, p.pain_description,
-            p.additional_symptoms, p.medical_history,
-            p.emergency_name, p.emergency_relation, p.emergency_gender,
-            p.emergency_contact, p.emergency_address,
-            p.photo_filename
-        ])
-
-    output = make_response(si.getvalue())
-    output.headers["Content-Disposition"] = "attachment; filename=patients.csv"
-    output.headers["Content-type"] = "text/csv"
-    return output
-
+    """Stream the patient table as CSV.
 
+    Query params (all optional): from/to (intake time), locale (en|hi|all, default all)
+    and vitals=1 to append each patient's latest vitals.
+    """
+    try:
+        locale = patients_service.check_locale(request.args.get('locale'))
+        start = parse_time(request.args.get('from'))
+        end = parse_time(request.args.get('to'))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    include_vitals = request.args.get('vitals', '').lower() in ('1', 'true', 'yes')
 
+    rows = patients_service.iter_csv(locale, start, end, include_vitals)
+    output = Response(stream_with_context(rows), mimetype='text/csv')
+    output.headers["Content-Disposition"] = "attachment; filename=patients.csv"
+    return output
@@ -1,9 +1,15 @@
-from flask import Blueprint, jsonify, request
-from ..services import sensors
+import json
+from flask import Blueprint, Response, jsonify, request
+from ..services import sensors, history
+from ..utils import conditional_json, parse_time
 
 
 sensors_bp = Blueprint('sensors', __name__)
 
+MAX_HISTORY_LIMIT = 10000
+MAX_BATCH_SIZE = 5000
+STREAM_KEEPALIVE = 15
+
 
 @sensors_bp.route('/sensor-data', methods=['POST'])
 def receive_data():
@@ -12,16 +18,101 @@ def receive_data():
     return jsonify({"status": "success"}), 200
 
 
+@sensors_bp.route('/sensor-data/batch', methods=['POST'])
+def receive_batch():
+    """Accept a JSON array (or {"readings": [...]}) or NDJSON body of readings."""
+    try:
+        if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+            readings = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+        else:
+            readings = request.get_json()
+            if isinstance(readings, dict):
+                readings = readings.get('readings')
+    except ValueError as e:
+        return jsonify({"status": "error", "message": f"Invalid batch body: {e}"}), 400
+
+    if not isinstance(readings, list) or not all(isinstance(r, dict) for r in readings):
+        return jsonify({"status": "error", "message": "Expected a list of reading objects"}), 400
+    if len(readings) > MAX_BATCH_SIZE:
+        return jsonify({"status": "error", "message": f"Batch exceeds {MAX_BATCH_SIZE} readings"}), 413
+
+    count = sensors.update_sensor_data_many(readings)
+    return jsonify({"status": "success", "accepted": count}), 200
+
+
+@sensors_bp.route('/sensor-history', methods=['GET'])
+def get_history():
+    fields = []
+    for value in request.args.getlist('field'):
+        fields.extend(f for f in value.split(',') if f)
+    unknown = [f for f in fields if f not in history.VITAL_FIELDS]
+    if unknown:
+        return jsonify({"status": "error", "message": f"Unknown field(s): {', '.join(unknown)}"}), 400
+
+    try:
+        start = parse_time(request.args.get('from'))
+        end = parse_time(request.args.get('to'))
+        limit = max(1, min(int(request.args.get('limit', 1000)), MAX_HISTORY_LIMIT))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    readings = history.query(
+        device_id=request.args.get('device'),
+        start=start,
+        end=end,
+        fields=fields,
+        limit=limit,
+    )
+    return jsonify({"fields": fields or list(history.VITAL_FIELDS), "readings": readings})
+
+
 @sensors_bp.route('/set-servos', methods=['POST'])
 def set_servos():
     data = request.get_json()
-    sensors.update_servo_angles(int(data.get('servo1', 90)), int(data.get('servo2', 90)))
+    sensors.update_servo_angles(int(data.get('servo1', 90)), int(data.get('servo2', 90)), data.get('device_id'))
     return jsonify({"status": "updated"}), 200
 
 
 @sensors_bp.route('/latest', methods=['GET'])
 def get_latest():
-    return jsonify(sensors.get_latest_data())
+    device_id = request.args.get('device')
+    version, data = sensors.get_latest_snapshot(device_id)
+    if data is None:
+        return jsonify({"status": "error", "message": f"Unknown device: {device_id}"}), 404
+    return conditional_json(f'sensors-{version}', lambda: data)
+
+
+@sensors_bp.route('/latest/stream', methods=['GET'])
+def stream_latest():
+    """Server-Sent Events feed of /latest, pushed whenever sensor state changes."""
+    device_id = request.args.get('device')
+
+    def generate():
+        version = -1
+        last_sent = None
+        yield 'retry: 2000\n\n'
+        while True:
+            new_version = sensors.wait_for_update(version, STREAM_KEEPALIVE)
+            if new_version == version:
+                yield ': keepalive\n\n'
+                continue
+            version = new_version
+            data = sensors.get_latest_data(device_id)
+            if data is None or data == last_sent:
+                continue
+            last_sent = data
+            yield f'id: {version}\ndata: {json.dumps(data)}\n\n'
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'X-Accel-Buffering': 'no'},
+    )
+
+
+@sensors_bp.route('/devices', methods=['GET'])
+def get_devices():
+    return jsonify({"devices": sensors.list_devices()})
 
 
 
@@ -1,8 +1,6 @@
 from flask import Blueprint, render_template, jsonify, request
 import serial.tools.list_ports
-import subprocess
-import sys
-import os
+from ..services import serial as serial_service
 
 serial_bp = Blueprint('serial', __name__)
 
@@ -28,47 +26,63 @@ def get_ports():
 
 @serial_bp.route('/api/start-serial-reader', methods=['POST'])
 def start_serial_reader():
-    """Start the serial reader with selected port"""
+    """Start an in-process reader thread for the selected port"""
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         port = data.get('port')
         
         if not port:
             return jsonify({'error': 'No port selected'}), 400
         
-        # Start serial reader as subprocess
-        script_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'serial_reader.py')
+        try:
+            baud_rate = int(data.get('baud_rate', serial_service.BAUD_RATE))
+        except (TypeError, ValueError):
+            baud_rate = 0
+        if baud_rate <= 0:
+            return jsonify({'error': 'baud_rate must be a positive integer'}), 400
         
-        # Use the same Python interpreter that's running Flask
-        python_exe = sys.executable
+        handle = serial_service.start_reader(port, baud_rate=baud_rate, device_id=data.get('device_id'))
         
-        # Start the process
-        process = subprocess.Popen([
-            python_exe, script_path, '--port', port
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        return jsonify({
-            'status': 'started',
-            'port': port,
-            'pid': process.pid
-        })
+        return jsonify({'status': 'started', **handle.to_dict()})
         
+    except serial_service.ReaderRunningError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        # pyserial rejects unsupported settings with ValueError
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @serial_bp.route('/api/stop-serial-reader', methods=['POST'])
 def stop_serial_reader():
-    """Stop the serial reader"""
+    """Stop the reader for one port, or every reader when no port is given"""
     try:
-        # Find and kill the serial reader process
-        if sys.platform == 'win32':
-            subprocess.run(['taskkill', '/f', '/im', 'python.exe'], 
-                         capture_output=True, text=True)
+        data = request.get_json(silent=True) or {}
+        port = data.get('port')
+        
+        if port:
+            if not serial_service.stop_reader(port):
+                return jsonify({'error': f'No serial reader running on {port}'}), 404
+            stopped = [port]
         else:
-            subprocess.run(['pkill', '-f', 'serial_reader.py'], 
-                         capture_output=True, text=True)
+            stopped = serial_service.stop_all()
         
-        return jsonify({'status': 'stopped'})
+        return jsonify({'status': 'stopped', 'ports': stopped})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@serial_bp.route('/api/serial-readers')
+def serial_readers():
+    """Status of every managed serial reader, or of one with ?port=
+
+    The port is a query parameter rather than part of the path, since
+    POSIX ports like /dev/ttyUSB0 contain slashes.
+    """
+    port = request.args.get('port')
+    if not port:
+        return jsonify({'readers': serial_service.list_readers()})
+    handle = serial_service.get_reader(port)
+    if handle is None:
+        return jsonify({'error': f'No serial reader running on {port}'}), 404
+    return jsonify(handle.to_dict())
@@ -1,10 +1,17 @@
-import threading
-from flask import Blueprint, jsonify, request
-from ..services.voice import process_voice, get_ai_response, speak_text
+import json
+import requests
+from flask import Blueprint, Response, jsonify, redirect, request, url_for
+from ..services import audio_cache, conversation, tts
+from ..services.voice import (
+    ERROR_MESSAGE, TIMEOUT_MESSAGE, process_voice, get_ai_response, response_cache, stream_ai_response,
+)
+from ..utils import send_immutable
 
 
 voice_bp = Blueprint('voice', __name__)
 
+MAX_BATCH_PHRASES = 64
+
 
 @voice_bp.route('/voice')
 def voice():
@@ -16,9 +23,171 @@ def voice():
 def ai_response():
     data = request.get_json()
     user_text = data.get('text', '')
-    response_text = get_ai_response(user_text)
-    threading.Thread(target=speak_text, args=(response_text,)).start()
-    return jsonify({"response": response_text})
+    response_text = get_ai_response(user_text, data.get('session_id'))
+    try:
+        tts.worker.speak(response_text)
+        spoken = True
+    except tts.EngineUnavailable as e:
+        print(f"Not speaking AI response: {e}")
+        spoken = False
+    return jsonify({"response": response_text, "spoken": spoken})
+
+
+@voice_bp.route('/ai_response/stream', methods=['POST'])
+def ai_response_stream():
+    """Server-Sent Events version of /ai_response: each text delta as it is generated.
+
+    Events: `data: {"delta": ...}` per chunk, then `event: done` with the full
+    response, or `event: error` with a message. With "speak": true in the body
+    each sentence is also spoken on the robot as soon as it is complete. A session_id
+    carries the conversation over between questions, as for /ai_response.
+    """
+    data = request.get_json(silent=True) or {}
+    user_text = data.get('text', '')
+    session_id = data.get('session_id')
+    speak = bool(data.get('speak'))
+
+    def generate():
+        parts = []
+        utterance = None
+        if speak:
+            try:
+                utterance = tts.worker.begin()
+            except tts.EngineUnavailable as e:
+                print(f"Not speaking AI response: {e}")
+        try:
+            for delta in stream_ai_response(user_text, session_id):
+                parts.append(delta)
+                if utterance is not None:
+                    utterance.feed(delta)
+                yield f'data: {json.dumps({"delta": delta})}\n\n'
+        except requests.exceptions.Timeout:
+            yield f'event: error\ndata: {json.dumps({"message": TIMEOUT_MESSAGE})}\n\n'
+            return
+        except requests.exceptions.RequestException:
+            yield f'event: error\ndata: {json.dumps({"message": ERROR_MESSAGE})}\n\n'
+            return
+        finally:
+            if utterance is not None:
+                utterance.finish()
+        response_text = ''.join(parts)
+        yield f'event: done\ndata: {json.dumps({"response": response_text})}\n\n'
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'X-Accel-Buffering': 'no'},
+    )
+
+
+@voice_bp.route('/speak', methods=['POST'])
+def speak():
+    """Speak text on the robot.
+
+    JSON body: text, priority (normal|high, default normal) and interrupt
+    (default true), which cuts off whatever is being said.
+    """
+    data = request.get_json(silent=True) or {}
+    text = str(data.get('text') or '').strip()
+    if not text:
+        return jsonify({"status": "error", "message": "No text to speak"}), 400
+    priority = tts.PRIORITIES.get(data.get('priority', 'normal'))
+    if priority is None:
+        return jsonify({"status": "error", "message": f"Unknown priority, expected one of {', '.join(tts.PRIORITIES)}"}), 400
+    try:
+        tts.worker.speak(text, priority, preempt=data.get('interrupt', True) is not False)
+    except tts.EngineUnavailable as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    return jsonify({"status": "queued"})
+
+
+@voice_bp.route('/speak/stop', methods=['POST'])
+def speak_stop():
+    tts.worker.stop()
+    return jsonify({"status": "stopped"})
+
+
+@voice_bp.route('/speak/status', methods=['GET'])
+def speak_status():
+    stats = tts.worker.stats()
+    return jsonify(stats), 200 if stats['available'] else 503
+
+
+@voice_bp.route('/ai_response/cache', methods=['GET'])
+def ai_cache_stats():
+    """Response cache size and hit/miss counters."""
+    return jsonify(response_cache.stats())
+
+
+@voice_bp.route('/ai_response/cache', methods=['DELETE'])
+def ai_cache_clear():
+    response_cache.clear()
+    return jsonify({"status": "cleared"})
+
+
+@voice_bp.route('/ai_response/session/<session_id>', methods=['DELETE'])
+def ai_session_clear(session_id):
+    """Forget a conversation's history."""
+    return jsonify({"status": "cleared" if conversation.clear(session_id) else "not_found"})
+
+
+@voice_bp.route('/prompt_audio')
+def prompt_audio():
+    """Redirect to the pre-rendered WAV of a fixed phrase.
+
+    Never renders on the request: a phrase not rendered yet is queued and
+    answered with 202, so the client speaks it live and can ask again later.
+    404 means no audio can be made (speech engine unavailable).
+    """
+    text = request.args.get('text', '')
+    lang = request.args.get('lang', 'en')
+    try:
+        name = audio_cache.cached_audio(text, lang)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    if name is not None:
+        return redirect(url_for('voice.prompt_audio_file', name=name))
+    if not tts.worker.available:
+        return jsonify({"status": "error", "message": tts.worker.error or "Speech engine unavailable"}), 404
+    audio_cache.prerender([text], lang)
+    return jsonify({"status": "pending"}), 202
+
+
+@voice_bp.route('/prompt_audio/batch', methods=['POST'])
+def prompt_audio_batch():
+    """Audio URLs for a list of fixed phrases, e.g. every question of an interview.
+
+    JSON body: phrases (list of strings) and lang (en|hi). Returns
+    {"audio": {phrase: url or null}, "pending": n} straight away: phrases not
+    rendered yet are null, meaning speak them live, and are queued for
+    rendering so a later call returns their URLs.
+    """
+    data = request.get_json(silent=True) or {}
+    phrases = data.get('phrases')
+    lang = data.get('lang', 'en')
+    if not isinstance(phrases, list) or len(phrases) > MAX_BATCH_PHRASES:
+        return jsonify({"status": "error", "message": f"phrases must be a list of at most {MAX_BATCH_PHRASES}"}), 400
+    if lang not in audio_cache.LANGUAGE_NAMES:
+        return jsonify({"status": "error", "message": f"Unknown language: {lang}"}), 400
 
+    audio = {}
+    missing = []
+    for phrase in map(str, phrases):
+        try:
+            name = audio_cache.cached_audio(phrase, lang)
+        except ValueError:
+            # Empty or too long to be a fixed prompt
+            audio[phrase] = None
+            continue
+        if name is None:
+            missing.append(phrase)
+        audio[phrase] = url_for('voice.prompt_audio_file', name=name) if name else None
+    if missing and tts.worker.available:
+        audio_cache.prerender(missing, lang)
+    return jsonify({"audio": audio, "pending": len(missing) if tts.worker.available else 0})
 
 
+@voice_bp.route('/prompt_audio/files/<name>')
+def prompt_audio_file(name):
+    """Serve a content-addressed prompt recording with immutable cache headers"""
+    return send_immutable(audio_cache.AUDIO_DIR, name)
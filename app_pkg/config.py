@@ -0,0 +1,74 @@
+import os
+
+
+def database_uri() -> str:
+    """$DATABASE_URL, or the bundled SQLite file. Accepts the postgres:// scheme some hosts use."""
+    uri = os.environ.get('DATABASE_URL', 'sqlite:///patientsss.db')
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri: str) -> dict:
+    """Connection pool settings for `uri`, overridable with DB_POOL_* variables."""
+    if uri in ('sqlite://', 'sqlite:///:memory:'):
+        # In-memory SQLite lives in a single connection; Flask-SQLAlchemy pins it
+        return {}
+    options = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    }
+    if uri.startswith('sqlite'):
+        # Seconds a writer waits on the database lock before "database is locked"
+        options['connect_args'] = {'timeout': float(os.environ.get('SQLITE_BUSY_TIMEOUT', 15))}
+    else:
+        options['pool_pre_ping'] = True
+        options['pool_recycle'] = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    return options
+
+
+class Config:
+    """Base config shared by every profile."""
+    SQLALCHEMY_DATABASE_URI = database_uri()
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Applied to every new SQLite connection; ignored for other databases.
+    # WAL lets dashboard reads run alongside the sensor writer instead of
+    # queueing behind its lock, and NORMAL only fsyncs at checkpoints.
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        # Negative values are KiB rather than pages
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 64 * 1024)),
+        'temp_store': 'MEMORY',
+    }
+    TEMPLATES_AUTO_RELOAD = False
+    SEND_FILE_MAX_AGE_DEFAULT = 0
+    # When True, static files keep Flask's public max-age caching instead of no-store
+    CACHE_STATIC = False
+
+
+class DevelopmentConfig(Config):
+    TEMPLATES_AUTO_RELOAD = True
+
+
+class ProductionConfig(Config):
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.environ.get('STATIC_MAX_AGE', 30 * 24 * 3600))
+    CACHE_STATIC = True
+
+
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+}
+
+
+def get_config(name=None):
+    """Resolve a profile by name, defaulting to the APP_CONFIG environment variable."""
+    name = name or os.environ.get('APP_CONFIG', 'development')
+    try:
+        return CONFIGS[name]
+    except KeyError:
+        raise ValueError(f"Unknown config profile '{name}', expected one of {sorted(CONFIGS)}")
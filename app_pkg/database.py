@@ -0,0 +1,31 @@
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .extensions import db
+
+
+def init_app(app) -> None:
+    """Apply the profile's SQLITE_PRAGMAS to every connection. Call inside an app context."""
+    engine = db.engine
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if engine.dialect.name == 'sqlite' and pragmas:
+        set_sqlite_pragmas(engine, pragmas)
+
+
+def set_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    """Run `PRAGMA name=value` for each entry whenever `engine` opens a connection."""
+    statements = [f'PRAGMA {name}={value}' for name, value in pragmas.items()]
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    # Connections opened before the listener existed would miss the pragmas
+    engine.dispose()
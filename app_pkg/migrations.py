@@ -0,0 +1,134 @@
+"""In-place schema upgrades for databases created by earlier versions.
+
+`db.create_all()` only creates missing tables, so changes to existing tables
+are applied here. Every step checks the live schema first and is safe to run
+on each start.
+"""
+import time
+
+from sqlalchemy import inspect, select, text
+
+from .extensions import db
+from .models import (
+    PATIENT_FTS_COLUMNS, PATIENT_FTS_TABLE, PATIENTS_VERSION, DataVersion, Patient, VitalReading,
+)
+
+
+# Columns shared by the old patient_hindi table and patient
+_LEGACY_HINDI_COLUMNS = [
+    'name', 'age', 'gender', 'contact', 'address',
+    'chief_complaint', 'pain_level', 'pain_description', 'additional_symptoms', 'medical_history',
+    'emergency_name', 'emergency_relation', 'emergency_gender', 'emergency_contact', 'emergency_address',
+    'photo_filename', 'heart_rate', 'spo2', 'body_temperature', 'environment_temperature', 'timestamp',
+]
+# Vitals that used to live on the patient row, now in vital_reading
+_LEGACY_VITAL_COLUMNS = ['heart_rate', 'spo2', 'body_temperature', 'environment_temperature']
+
+
+def upgrade() -> None:
+    """Bring the bound database up to the current models. Call inside an app context."""
+    with db.engine.begin() as conn:
+        _add_missing_column(conn, Patient.__table__.c.locale)
+        _merge_patient_hindi(conn)
+        _split_patient_vitals(conn)
+        _create_patient_fts(conn)
+        # Name lookups all go through lower(name); the plain index was never read
+        _drop_index(conn, 'ix_patient_name')
+        _create_missing_indexes(conn, Patient.__table__)
+        _create_missing_indexes(conn, VitalReading.__table__)
+        _seed_data_version(conn, PATIENTS_VERSION)
+
+
+def _add_missing_column(conn, column) -> None:
+    table = column.table.name
+    existing = {c['name'] for c in inspect(conn).get_columns(table)}
+    if column.name in existing:
+        return
+    ddl = f'ALTER TABLE {table} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}'
+    if column.server_default is not None:
+        ddl += f" DEFAULT '{column.server_default.arg}'"
+    if not column.nullable:
+        ddl += ' NOT NULL'
+    conn.execute(text(ddl))
+
+
+def _merge_patient_hindi(conn) -> None:
+    # patient_hindi had the same columns as patient; its rows become locale 'hi'.
+    # Hindi ids collided with English ones, so merged rows get new ids.
+    if not inspect(conn).has_table('patient_hindi'):
+        return
+    existing = {c['name'] for c in inspect(conn).get_columns('patient')}
+    columns = ', '.join(c for c in _LEGACY_HINDI_COLUMNS if c in existing)
+    conn.execute(text(
+        f"INSERT INTO patient ({columns}, locale) "
+        f"SELECT {columns}, 'hi' FROM patient_hindi ORDER BY id"
+    ))
+    conn.execute(text('DROP TABLE patient_hindi'))
+
+
+def _split_patient_vitals(conn) -> None:
+    # Intake vitals become each patient's first reading, stamped with the intake time
+    existing = {c['name'] for c in inspect(conn).get_columns('patient')}
+    legacy = [c for c in _LEGACY_VITAL_COLUMNS if c in existing]
+    if not legacy:
+        return
+    columns = ', '.join(legacy)
+    conn.execute(text(
+        f"INSERT INTO vital_reading (patient_id, timestamp, {columns}) "
+        f"SELECT id, COALESCE(timestamp, CURRENT_TIMESTAMP), {columns} FROM patient "
+        f"WHERE {' OR '.join(f'{c} IS NOT NULL' for c in legacy)} ORDER BY id"
+    ))
+    for column in legacy:
+        conn.execute(text(f'ALTER TABLE patient DROP COLUMN {column}'))
+
+
+def _create_patient_fts(conn) -> None:
+    # External-content FTS5 table: the text lives only in patient, the index is
+    # maintained by triggers and built once from existing rows
+    if conn.dialect.name != 'sqlite' or inspect(conn).has_table(PATIENT_FTS_TABLE):
+        return
+    if not conn.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar():
+        print("SQLite was built without FTS5; patient text search falls back to LIKE")
+        return
+    fts = PATIENT_FTS_TABLE
+    columns = ', '.join(PATIENT_FTS_COLUMNS)
+    new_values = ', '.join(f'new.{c}' for c in PATIENT_FTS_COLUMNS)
+    old_values = ', '.join(f'old.{c}' for c in PATIENT_FTS_COLUMNS)
+    delete_old = f"INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    insert_new = f"INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new_values});"
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, content='patient', content_rowid='id')"
+    ))
+    conn.execute(text(f"CREATE TRIGGER {fts}_ai AFTER INSERT ON patient BEGIN {insert_new} END"))
+    conn.execute(text(f"CREATE TRIGGER {fts}_ad AFTER DELETE ON patient BEGIN {delete_old} END"))
+    conn.execute(text(f"CREATE TRIGGER {fts}_au AFTER UPDATE ON patient BEGIN {delete_old} {insert_new} END"))
+    conn.execute(text(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')"))
+
+
+def _seed_data_version(conn, name: str) -> None:
+    # Start from the clock rather than 0, so a recreated database never
+    # hands out a version (and so an ETag) that an old one already used
+    table = DataVersion.__table__
+    if conn.execute(select(table.c.name).where(table.c.name == name)).first() is None:
+        conn.execute(table.insert().values(name=name, version=time.time_ns() // 1000))
+
+
+def _drop_index(conn, name: str) -> None:
+    conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
+
+
+def _create_missing_indexes(conn, table) -> None:
+    existing = _index_names(conn, table.name)
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(conn)
+
+
+def _index_names(conn, table_name: str) -> set:
+    # SQLite reflection skips expression indexes such as lower(name), so
+    # checkfirst would try to recreate them; read the catalog directly instead
+    if conn.dialect.name == 'sqlite':
+        return set(conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table_name,)
+        ).scalars())
+    return {index['name'] for index in inspect(conn).get_indexes(table_name)}
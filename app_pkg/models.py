@@ -2,12 +2,25 @@ from datetime import datetime
 from .extensions import db
 
 
+LOCALES = ('en', 'hi')
+
+# SQLite FTS5 index over the free-text intake fields, kept in sync by triggers
+# (see migrations). Not a mapped table.
+PATIENT_FTS_TABLE = 'patient_fts'
+PATIENT_FTS_COLUMNS = ('name', 'chief_complaint', 'additional_symptoms', 'medical_history')
+
+
 class Patient(db.Model):
+    __table_args__ = (
+        db.Index('ix_patient_locale_timestamp', 'locale', 'timestamp'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    locale = db.Column(db.String(8), nullable=False, default='en', server_default='en')
     name = db.Column(db.String(100), nullable=False)
     age = db.Column(db.Integer, nullable=False)
     gender = db.Column(db.String(10), nullable=False)
-    contact = db.Column(db.String(20), nullable=False)
+    contact = db.Column(db.String(20), nullable=False, index=True)
     address = db.Column(db.String(255), nullable=False)
     chief_complaint = db.Column(db.String(255), nullable=True)
     pain_level = db.Column(db.Integer, nullable=True)
@@ -20,37 +33,61 @@ class Patient(db.Model):
     emergency_contact = db.Column(db.String(20), nullable=True)
     emergency_address = db.Column(db.String(255), nullable=True)
     photo_filename = db.Column(db.String(255), nullable=True)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    vitals = db.relationship(
+        'VitalReading', backref='patient', lazy='dynamic', cascade='all, delete-orphan',
+        order_by='VitalReading.timestamp',
+    )
+
+
+# Case-insensitive name prefix search is a range scan on lower(name)
+db.Index('ix_patient_name_lower', db.func.lower(Patient.name))
+
+
+class VitalReading(db.Model):
+    """One time-stamped set of vitals for a patient; the first is taken at intake."""
+    __tablename__ = 'vital_reading'
+    __table_args__ = (
+        db.Index('ix_vital_reading_patient_timestamp', 'patient_id', 'timestamp'),
+    )
 
+    id = db.Column(db.Integer, primary_key=True)
+    patient_id = db.Column(db.Integer, db.ForeignKey('patient.id', ondelete='CASCADE'), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     heart_rate = db.Column(db.Integer)
     spo2 = db.Column(db.Float)
     body_temperature = db.Column(db.Float)
     environment_temperature = db.Column(db.Float)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
 
-class PatientHindi(db.Model):
-    __tablename__ = 'patient_hindi'
+# DataVersion row holding the change counter of the patient tables
+PATIENTS_VERSION = 'patients'
+
+
+class DataVersion(db.Model):
+    """Change counters shared by every process using the database, one row per group of tables."""
+    __tablename__ = 'data_version'
+
+    name = db.Column(db.String(32), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+
+class SensorReading(db.Model):
+    """Append-only vitals history, one row per sample per device."""
+    __tablename__ = 'sensor_reading'
+    __table_args__ = (
+        db.Index('ix_sensor_reading_device_time', 'device_id', 'recorded_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    age = db.Column(db.Integer, nullable=False)
-    gender = db.Column(db.String(10), nullable=False)
-    contact = db.Column(db.String(20), nullable=False)
-    address = db.Column(db.String(255), nullable=False)
-    chief_complaint = db.Column(db.String(255), nullable=True)
-    pain_level = db.Column(db.Integer, nullable=True)
-    pain_description = db.Column(db.String(255), nullable=True)
-    additional_symptoms = db.Column(db.String(255), nullable=True)
-    medical_history = db.Column(db.String(255), nullable=True)
-    emergency_name = db.Column(db.String(100), nullable=True)
-    emergency_relation = db.Column(db.String(50), nullable=True)
-    emergency_gender = db.Column(db.String(10), nullable=True)
-    emergency_contact = db.Column(db.String(20), nullable=True)
-    emergency_address = db.Column(db.String(255), nullable=True)
-    photo_filename = db.Column(db.String(255), nullable=True)
+    device_id = db.Column(db.String(64), nullable=False)
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    device_timestamp = db.Column(db.BigInteger)
     heart_rate = db.Column(db.Integer)
     spo2 = db.Column(db.Float)
     body_temperature = db.Column(db.Float)
     environment_temperature = db.Column(db.Float)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-
-
+    humidity = db.Column(db.Float)
+    distance = db.Column(db.Float)
+    weight = db.Column(db.Float)
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import queue
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from ..utils import atomic_write
+from . import tts
+
+
+AUDIO_DIR = os.path.join('static', 'audio', 'tts')
+# Only short fixed prompts are worth keeping; anything longer is spoken live
+MAX_PHRASE_LENGTH = 300
+RENDER_TIMEOUT = 30.0
+LANGUAGE_NAMES = {'en': 'english', 'hi': 'hindi'}
+
+# lang -> voice id ('' for the engine default), or None if the engine has no voice for it
+_voices: Dict[str, Optional[str]] = {}
+_voices_lock = threading.Lock()
+
+# Phrases waiting for the background renderer, as (text, lang, rate)
+_render_queue: queue.Queue = queue.Queue()
+_pending: Set[Tuple[str, str, int]] = set()
+_renderer: Optional[threading.Thread] = None
+_renderer_lock = threading.Lock()
+
+
+def normalize_phrase(text: str) -> str:
+    return ' '.join(str(text).split())
+
+
+def audio_name(text: str, lang: str, voice_id: str, rate: int) -> str:
+    """Content address of a rendered phrase: anything that changes the audio changes the name."""
+    raw = json.dumps([text, lang, voice_id, rate], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:20] + '.wav'
+
+
+def get_audio(text: str, lang: str = 'en', rate: int = tts.SPEECH_RATE) -> Optional[str]:
+    """Name of the cached WAV for a phrase, rendering it if needed.
+
+    Blocks on the speech worker for up to RENDER_TIMEOUT, so requests use
+    cached_audio() and prerender() and leave this to the background renderer.
+
+    Returns None if the engine is unavailable, has no voice for `lang`, or
+    rendering failed or timed out; callers then fall back to speaking the
+    text live. Raises ValueError for an unknown language or an empty or
+    over-long phrase.
+    """
+    text = _validate(text, lang)
+    try:
+        voice_id = voice_for(lang)
+        if voice_id is None:
+            return None
+        name = audio_name(text, lang, voice_id, rate)
+        if not os.path.exists(os.path.join(AUDIO_DIR, name)):
+            tts.worker.call(lambda engine: _render(engine, text, voice_id, rate, name), RENDER_TIMEOUT)
+    except tts.EngineUnavailable as e:
+        print(f"Prompt audio unavailable: {e}")
+        return None
+    except TimeoutError:
+        # The render stays queued on the worker and is picked up by a later request
+        print(f"Prompt audio render timed out after {RENDER_TIMEOUT}s")
+        return None
+    except Exception as e:
+        print(f"Prompt audio render failed: {e}")
+        return None
+    return name if os.path.exists(os.path.join(AUDIO_DIR, name)) else None
+
+
+def cached_audio(text: str, lang: str = 'en', rate: int = tts.SPEECH_RATE) -> Optional[str]:
+    """Name of the WAV for a phrase if it is already rendered, without touching the engine."""
+    text = _validate(text, lang)
+    with _voices_lock:
+        voice_id = _voices.get(lang, os.getenv(f'TTS_VOICE_{lang.upper()}'))
+    if voice_id is None:
+        return None
+    name = audio_name(text, lang, voice_id, rate)
+    return name if os.path.exists(os.path.join(AUDIO_DIR, name)) else None
+
+
+def prerender(phrases: Iterable[str], lang: str = 'en', rate: int = tts.SPEECH_RATE) -> int:
+    """Queue phrases for rendering in the background; returns how many were newly queued."""
+    queued = 0
+    with _renderer_lock:
+        for text in phrases:
+            key = (_validate(text, lang), lang, rate)
+            if key not in _pending:
+                _pending.add(key)
+                _render_queue.put(key)
+                queued += 1
+        _ensure_renderer()
+    return queued
+
+
+def voice_for(lang: str) -> Optional[str]:
+    """Engine voice id for a language, looked up once. TTS_VOICE_<LANG> overrides the lookup."""
+    with _voices_lock:
+        if lang in _voices:
+            return _voices[lang]
+    # Not cached if the lookup raises, so a later request can try again
+    voice_id = os.getenv(f'TTS_VOICE_{lang.upper()}') or tts.worker.call(
+        lambda engine: _find_voice(engine, lang), RENDER_TIMEOUT
+    )
+    with _voices_lock:
+        _voices[lang] = voice_id
+    return voice_id
+
+
+def _validate(text: str, lang: str) -> str:
+    if lang not in LANGUAGE_NAMES:
+        raise ValueError(f"Unknown language: {lang}")
+    text = normalize_phrase(text)
+    if not text or len(text) > MAX_PHRASE_LENGTH:
+        raise ValueError(f"Phrase must be 1-{MAX_PHRASE_LENGTH} characters")
+    return text
+
+
+def _ensure_renderer() -> None:
+    # Caller holds _renderer_lock
+    global _renderer
+    if _renderer is None or not _renderer.is_alive():
+        _renderer = threading.Thread(target=_render_loop, name='prompt-audio-renderer', daemon=True)
+        _renderer.start()
+
+
+def _render_loop() -> None:
+    while True:
+        key = _render_queue.get()
+        try:
+            get_audio(*key)
+        finally:
+            with _renderer_lock:
+                _pending.discard(key)
+            _render_queue.task_done()
+
+
+def _find_voice(engine, lang: str) -> Optional[str]:
+    # Voices describe their language differently per driver: espeak fills
+    # `languages` ("en-us"), SAPI puts it in the name ("... - Hindi (India)")
+    # and the id ("...TTS_MS_HI-IN_...")
+    language = LANGUAGE_NAMES[lang]
+    for voice in engine.getProperty('voices') or []:
+        languages = [_text(l).lstrip('\x05').lower() for l in getattr(voice, 'languages', None) or []]
+        name = _text(getattr(voice, 'name', '')).lower()
+        voice_id = _text(getattr(voice, 'id', ''))
+        if (any(l == lang or l.startswith(lang + '-') or l.startswith(lang + '_') for l in languages)
+                or language in name
+                or f'{lang}-' in voice_id.lower() or f'_{lang}_' in voice_id.lower()):
+            return voice_id
+    # English prompts can always use whatever the engine speaks by default
+    return '' if lang == 'en' else None
+
+
+def _render(engine, text: str, voice_id: str, rate: int, name: str) -> None:
+    path = os.path.join(AUDIO_DIR, name)
+    if os.path.exists(path):
+        # Another request rendered it while this one was queued
+        return
+
+    def save(temp_path: str) -> None:
+        engine.save_to_file(text, temp_path)
+        engine.runAndWait()
+
+    previous = {key: engine.getProperty(key) for key in ('voice', 'rate')}
+    try:
+        if voice_id:
+            engine.setProperty('voice', voice_id)
+        engine.setProperty('rate', rate)
+        written = atomic_write(path, save)
+    finally:
+        for key, value in previous.items():
+            if value:
+                engine.setProperty(key, value)
+    if not written:
+        print(f"TTS render produced no audio for {name}")
+
+
+def _text(value: Any) -> str:
+    return value.decode('utf-8', errors='ignore') if isinstance(value, bytes) else str(value or '')
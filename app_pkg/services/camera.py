@@ -1,56 +1,377 @@
+import atexit
 import os
+import queue
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, NamedTuple, Optional, Tuple
 import cv2
 from flask import Response
+from ..utils import atomic_write
+from . import thumbnails
+from .thumbnails import UPLOAD_DIR
 
 
-# Global camera instance
-_camera = None
+FRAME_BUFFER_SIZE = 4
+FRAME_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
 
+# Requested stream settings snap to these, so viewers asking for slightly
+# different values share one profile and its encode. Widths are never
+# upscaled past the sensor resolution.
+STREAM_QUALITIES = (30, 50, 70, 85)
+STREAM_WIDTHS = (160, 320, 480, 640, 960, 1280)
+MAX_FPS = 30.0
 
-def get_camera():
-    """Get camera instance, create if needed"""
-    global _camera
-    if _camera is None or not _camera.isOpened():
-        _camera = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-        if not _camera.isOpened():
-            _camera = cv2.VideoCapture(2)
-    return _camera
+# How long capture_photo waits for the live stream to produce a frame
+GRAB_TIMEOUT = 2.0
 
+# Seconds the device stays open after its last user lets go
+CAMERA_IDLE_TIMEOUT = 30.0
 
-def generate_frames():
-    """Generate video frames for streaming"""
+
+class CameraPool:
+    """The shared camera device: opened lazily once, reference-counted across
+    users and only released after CAMERA_IDLE_TIMEOUT seconds without any.
+
+    Opening the device (DSHOW probe, then fallback to index 2) costs hundreds
+    of milliseconds, so back-to-back streams and captures reuse one handle.
+    """
+
+    def __init__(self, idle_timeout: float = CAMERA_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._capture = None
+        self._refs = 0
+        self._lock = threading.Lock()
+        # cv2.VideoCapture is not thread-safe; reads are serialized
+        self._read_lock = threading.Lock()
+        self._idle_timer: Optional[threading.Timer] = None
+
+    def acquire(self):
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if self._capture is None or not self._capture.isOpened():
+                self._capture = self._open()
+            self._refs += 1
+            return self._capture
+
+    def release(self) -> None:
+        with self._lock:
+            self._refs = max(0, self._refs - 1)
+            if self._refs == 0 and self._idle_timer is None:
+                self._idle_timer = threading.Timer(self.idle_timeout, self._close_if_idle)
+                self._idle_timer.daemon = True
+                self._idle_timer.start()
+
+    @contextmanager
+    def session(self):
+        camera = self.acquire()
+        try:
+            yield camera
+        finally:
+            self.release()
+
+    def read(self, camera):
+        with self._read_lock:
+            return camera.read()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._capture is not None
+
+    def close(self) -> None:
+        """Release the device now, regardless of users"""
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            self._release_capture()
+
+    def _close_if_idle(self) -> None:
+        with self._lock:
+            self._idle_timer = None
+            if self._refs == 0:
+                self._release_capture()
+
+    def _release_capture(self) -> None:
+        # Caller holds self._lock
+        if self._capture is not None:
+            self._capture.release()
+            self._capture = None
+
+    @staticmethod
+    def _open():
+        capture = cv2.VideoCapture(0, cv2.CAP_DSHOW)
+        if not capture.isOpened():
+            capture = cv2.VideoCapture(2)
+        return capture
+
+
+_pool = CameraPool()
+
+
+def read_frame():
+    """Read one frame from the shared camera"""
+    with _pool.session() as camera:
+        return _pool.read(camera)
+
+
+class StreamProfile(NamedTuple):
+    """Output encoding shared by every viewer that asks for the same settings.
+
+    None means the camera default: full resolution, OpenCV's default JPEG quality.
+    """
+    quality: Optional[int] = None
+    width: Optional[int] = None
+
+    @classmethod
+    def create(cls, quality: Optional[int] = None, width: Optional[int] = None) -> 'StreamProfile':
+        if quality is not None:
+            quality = min(STREAM_QUALITIES, key=lambda q: (abs(q - int(quality)), q))
+        if width is not None:
+            # The smallest standard width that is at least what was asked for
+            width = next((w for w in STREAM_WIDTHS if w >= int(width)), STREAM_WIDTHS[-1])
+        return cls(quality, width)
+
+
+DEFAULT_PROFILE = StreamProfile()
+
+
+class FrameBroadcaster:
+    """One capture-and-encode thread publishing JPEG frames to any number of readers.
+
+    Each captured frame is resized once per requested width and encoded once
+    per active profile. Results land in per-profile ring buffers as immutable
+    bytes, so every subscriber yields the same object and encode cost depends
+    on the number of distinct profiles, not viewers.
+    """
+
+    def __init__(self, size: int = FRAME_BUFFER_SIZE):
+        self._size = size
+        self._frames: Dict[StreamProfile, Deque[Tuple[int, bytes]]] = {}
+        self._subscribers: Dict[StreamProfile, int] = {}
+        self._seq = 0
+        self._raw = None
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> bool:
+        with self._cond:
+            return self._thread is not None
+
+    def subscribe(self, profile: StreamProfile = DEFAULT_PROFILE) -> None:
+        with self._cond:
+            self._subscribers[profile] = self._subscribers.get(profile, 0) + 1
+            self._frames.setdefault(profile, deque(maxlen=self._size))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='camera-broadcaster', daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, profile: StreamProfile = DEFAULT_PROFILE) -> None:
+        with self._cond:
+            self._subscribers[profile] -= 1
+            if self._subscribers[profile] <= 0:
+                del self._subscribers[profile]
+                del self._frames[profile]
+
+    def wait_for_frame(self, profile: StreamProfile, after_seq: int,
+                       timeout: float = 1.0) -> Optional[Tuple[int, bytes]]:
+        """Newest (seq, jpeg) for `profile` published after `after_seq`, or None on timeout."""
+        def ready():
+            frames = self._frames.get(profile)
+            return bool(frames) and frames[-1][0] > after_seq
+
+        with self._cond:
+            if not self._cond.wait_for(ready, timeout):
+                return None
+            return self._frames[profile][-1]
+
+    def latest_raw_frame(self, timeout: float = GRAB_TIMEOUT):
+        """Newest unencoded frame from the running stream, or None if it is not running."""
+        with self._cond:
+            if self._thread is None:
+                return None
+            if not self._cond.wait_for(lambda: self._raw is not None or self._thread is None, timeout):
+                return None
+            return self._raw
+
+    def _run(self) -> None:
+        # Hold the device for the whole stream; the pool keeps it open a while after
+        try:
+            with _pool.session() as camera:
+                self._stream(camera)
+        finally:
+            with self._cond:
+                # Only reached with our thread still registered if _stream raised
+                if self._thread is threading.current_thread():
+                    self._thread = None
+                    self._raw = None
+                    self._cond.notify_all()
+
+    def _stream(self, camera) -> None:
+        while True:
+            with self._cond:
+                if not self._subscribers:
+                    self._thread = None
+                    self._raw = None
+                    self._cond.notify_all()
+                    return
+                profiles = list(self._subscribers)
+
+            ret, frame = _pool.read(camera)
+            if not ret:
+                time.sleep(0.1)
+                continue
+
+            encoded = self._encode(frame, profiles)
+            with self._cond:
+                self._seq += 1
+                self._raw = frame
+                for profile, jpeg in encoded.items():
+                    frames = self._frames.get(profile)
+                    if frames is not None:
+                        frames.append((self._seq, jpeg))
+                self._cond.notify_all()
+
+    @staticmethod
+    def _encode(frame, profiles) -> Dict[StreamProfile, bytes]:
+        resized = {}
+        encoded = {}
+        height, source_width = frame.shape[:2]
+        for profile in profiles:
+            width = profile.width if profile.width and profile.width < source_width else None
+            if width not in resized:
+                resized[width] = frame if width is None else cv2.resize(
+                    frame, (width, max(1, height * width // source_width)), interpolation=cv2.INTER_AREA)
+            params = [] if profile.quality is None else [cv2.IMWRITE_JPEG_QUALITY, profile.quality]
+            ret, buffer = cv2.imencode('.jpg', resized[width], params)
+            if ret:
+                encoded[profile] = buffer.tobytes()
+        return encoded
+
+
+_broadcaster = FrameBroadcaster()
+
+
+def generate_frames(profile: StreamProfile = DEFAULT_PROFILE, fps: Optional[float] = None):
+    """Generate video frames for streaming.
+
+    With `fps` set, frames are paced to at most that rate. A consumer that is
+    slower than the camera always gets the newest frame; older ones are skipped
+    rather than queued.
+    """
+    interval = 1.0 / min(float(fps), MAX_FPS) if fps else 0.0
+    _broadcaster.subscribe(profile)
+    try:
+        seq = 0
+        next_due = 0.0
+        while True:
+            if interval:
+                delay = next_due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            item = _broadcaster.wait_for_frame(profile, seq)
+            if item is None:
+                continue
+            seq, jpeg = item
+            next_due = time.monotonic() + interval
+            # Separate chunks so the shared frame bytes are never copied per client
+            yield FRAME_HEADER
+            yield jpeg
+            yield b'\r\n'
+    finally:
+        _broadcaster.unsubscribe(profile)
+
+
+_write_queue: queue.Queue = queue.Queue()
+_writer: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+# Reserved filename -> frame, until the writer has renamed the file into place
+_pending: Dict[str, Any] = {}
+
+
+def _reserve_filename(frame) -> str:
+    with _writer_lock:
+        stamp = int(time.time())
+        suffix = 0
+        while True:
+            filename = f"captured_image_{stamp}.jpg" if not suffix else f"captured_image_{stamp}_{suffix}.jpg"
+            if filename not in _pending and not os.path.exists(os.path.join(UPLOAD_DIR, filename)):
+                _pending[filename] = frame
+                return filename
+            suffix += 1
+
+
+def _ensure_writer() -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name='photo-writer', daemon=True)
+            _writer.start()
+
+
+def _writer_loop() -> None:
     while True:
-        camera = get_camera()
-        ret, frame = camera.read()
-        
-        if ret:
-            ret, buffer = cv2.imencode('.jpg', frame)
-            frame_bytes = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        else:
-            time.sleep(0.1)
+        filename, frame = _write_queue.get()
+        try:
+            _write_photo(filename, frame)
+            with _writer_lock:
+                _pending.pop(filename, None)
+            thumbnails.create_thumbnails(filename, frame)
+        except Exception as e:
+            print(f"Failed to save {filename}: {e}")
+        finally:
+            with _writer_lock:
+                _pending.pop(filename, None)
+            _write_queue.task_done()
+
+
+def _write_photo(filename: str, frame) -> None:
+    if not atomic_write(os.path.join(UPLOAD_DIR, filename), lambda path: cv2.imwrite(path, frame)):
+        raise OSError('JPEG encoder wrote nothing')
 
 
 def capture_photo():
-    """Capture a photo and save to uploads folder"""
-    camera = get_camera()
-    ret, frame = camera.read()
-    
-    if not ret:
-        return None
-    
-    filename = f"captured_image_{int(time.time())}.jpg"
-    os.makedirs('static/uploads', exist_ok=True)
-    filepath = os.path.join('static/uploads', filename)
-    cv2.imwrite(filepath, frame)
+    """Capture a photo and queue it for saving to the uploads folder.
+
+    Reuses the newest frame of the live stream when one is running. Returns the
+    reserved filename immediately; until the background writer has saved the
+    file, pending_photo() serves it from memory.
+    """
+    frame = _broadcaster.latest_raw_frame()
+    if frame is None:
+        ret, frame = read_frame()
+        if not ret:
+            return None
+
+    filename = _reserve_filename(frame)
+    _ensure_writer()
+    _write_queue.put((filename, frame))
     return filename
 
 
-def cleanup(exception=None):
+def pending_photo(filename: str) -> Optional[bytes]:
+    """JPEG of a captured photo that is not on disk yet, or None."""
+    with _writer_lock:
+        frame = _pending.get(filename)
+    if frame is None:
+        return None
+    ret, buffer = cv2.imencode('.jpg', frame)
+    return buffer.tobytes() if ret else None
+
+
+def wait_for_writes() -> None:
+    """Block until every queued photo has been written"""
+    _write_queue.join()
+
+
+def cleanup() -> None:
     """Release camera resources"""
-    global _camera
-    if _camera:
-        _camera.release()
-        _camera = None
\ No newline at end of file
+    _pool.close()
+
+
+atexit.register(cleanup)
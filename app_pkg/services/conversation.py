@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+# Approximate prompt tokens reserved for earlier turns of a conversation
+CONTEXT_TOKEN_BUDGET = 1500
+# When over budget, drop oldest turns until history fits in this fraction of it.
+# Trimming in blocks keeps the prompt prefix unchanged between trims, which
+# upstream prefix caching relies on.
+TRIM_TARGET = 0.5
+MAX_SESSIONS = 256
+SESSION_IDLE_TIMEOUT = 30 * 60
+
+Message = Dict[str, str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate without a tokenizer: about 3 UTF-8 bytes per token.
+
+    Overcounts English (~4 chars per token) and stays safe for Devanagari.
+    """
+    return len(text.encode('utf-8')) // 3 + 1
+
+
+class Conversation:
+    """Earlier turns of one Q&A session, kept within a token budget."""
+
+    def __init__(self, budget: int = CONTEXT_TOKEN_BUDGET):
+        self.budget = budget
+        self.turns: List[Message] = []
+        self.tokens = 0
+        self.touched = time.monotonic()
+
+    def add_exchange(self, user_input: str, reply: str) -> None:
+        for role, content in (('user', user_input), ('assistant', reply)):
+            content = _clip(content, self.budget // 2)
+            self.turns.append({'role': role, 'content': content})
+            self.tokens += estimate_tokens(content)
+        if self.tokens > self.budget:
+            self._trim(int(self.budget * TRIM_TARGET))
+
+    def _trim(self, target: int) -> None:
+        # Drop whole exchanges, oldest first, always keeping the latest one
+        while len(self.turns) > 2 and self.tokens > target:
+            for _ in range(2):
+                self.tokens -= estimate_tokens(self.turns.pop(0)['content'])
+
+
+_sessions: 'OrderedDict[str, Conversation]' = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def build_messages(system_prompt: str, session_id: Optional[str], user_input: str) -> List[Message]:
+    """Chat messages for the next request: the fixed system prompt, then the
+    session's history, then the new question. Bounded by the budget however
+    long the session runs."""
+    return [
+        {'role': 'system', 'content': system_prompt},
+        *history(session_id),
+        {'role': 'user', 'content': _clip(user_input, CONTEXT_TOKEN_BUDGET // 2)},
+    ]
+
+
+def history(session_id: Optional[str]) -> List[Message]:
+    """Earlier turns for `session_id`, oldest first; empty for no or unknown session."""
+    if not session_id:
+        return []
+    with _sessions_lock:
+        _expire()
+        conversation = _sessions.get(session_id)
+        return list(conversation.turns) if conversation else []
+
+
+def record_turn(session_id: Optional[str], user_input: str, reply: str) -> None:
+    if not session_id:
+        return
+    with _sessions_lock:
+        _expire()
+        conversation = _sessions.get(session_id)
+        if conversation is None:
+            conversation = _sessions[session_id] = Conversation()
+        conversation.add_exchange(user_input, reply)
+        conversation.touched = time.monotonic()
+        _sessions.move_to_end(session_id)
+        while len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+
+
+def clear(session_id: str) -> bool:
+    with _sessions_lock:
+        return _sessions.pop(session_id, None) is not None
+
+
+def _expire() -> None:
+    # Caller holds _sessions_lock; least recently used first
+    cutoff = time.monotonic() - SESSION_IDLE_TIMEOUT
+    while _sessions:
+        oldest = next(iter(_sessions.values()))
+        if oldest.touched >= cutoff:
+            break
+        _sessions.popitem(last=False)
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Keep the start of an over-long turn; 3 bytes per token mirrors estimate_tokens
+    return text.encode('utf-8')[:max_tokens * 3].decode('utf-8', errors='ignore') + '…'
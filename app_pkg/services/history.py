@@ -0,0 +1,135 @@
+import atexit
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import insert
+
+from ..extensions import db
+from ..models import SensorReading
+
+
+# Group commit settings: a batch is written when it reaches FLUSH_SIZE rows
+# or FLUSH_INTERVAL seconds after the first pending row, whichever is first.
+FLUSH_SIZE = 256
+FLUSH_INTERVAL = 0.5
+
+VITAL_FIELDS = (
+    'heart_rate',
+    'spo2',
+    'body_temperature',
+    'environment_temperature',
+    'humidity',
+    'distance',
+    'weight',
+)
+
+_app = None
+_pending: List[Dict[str, Any]] = []
+_pending_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_writer_lock = threading.Lock()
+_wakeup = threading.Event()
+_writer: Optional[threading.Thread] = None
+
+
+def init_app(app) -> None:
+    """Bind the history writer to an application so it can open app contexts."""
+    global _app
+    _app = app
+    atexit.register(flush)
+
+
+def record(device_id: str, data: Dict[str, Any], recorded_at: Optional[datetime] = None) -> None:
+    """Queue one sample for the next group commit."""
+    if _app is None:
+        return
+
+    row = {field: data.get(field) for field in VITAL_FIELDS}
+    row['device_id'] = device_id
+    row['recorded_at'] = recorded_at or datetime.utcnow()
+    row['device_timestamp'] = data.get('timestamp')
+
+    with _pending_lock:
+        _pending.append(row)
+        size = len(_pending)
+
+    _ensure_writer()
+    if size >= FLUSH_SIZE:
+        _wakeup.set()
+
+
+def flush() -> int:
+    """Write all pending samples in a single transaction. Returns rows written."""
+    global _pending
+    if _app is None:
+        return 0
+
+    with _flush_lock:
+        with _pending_lock:
+            rows, _pending = _pending, []
+        if not rows:
+            return 0
+
+        with _app.app_context():
+            try:
+                db.session.execute(insert(SensorReading), rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Sensor history write failed, dropped {len(rows)} rows: {e}")
+                return 0
+    return len(rows)
+
+
+def query(
+    device_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    fields: Optional[Sequence[str]] = None,
+    limit: int = 1000,
+) -> List[Dict[str, Any]]:
+    """Return samples ordered by time, optionally narrowed to a device, range and fields."""
+    flush()
+
+    fields = list(fields) if fields else list(VITAL_FIELDS)
+    columns = [SensorReading.device_id, SensorReading.recorded_at, SensorReading.device_timestamp]
+    columns += [getattr(SensorReading, f) for f in fields]
+
+    q = db.session.query(*columns)
+    if device_id is not None:
+        q = q.filter(SensorReading.device_id == device_id)
+    if start is not None:
+        q = q.filter(SensorReading.recorded_at >= start)
+    if end is not None:
+        q = q.filter(SensorReading.recorded_at <= end)
+    q = q.order_by(SensorReading.recorded_at, SensorReading.id).limit(limit)
+
+    readings = []
+    for row in q:
+        item = {
+            'device_id': row.device_id,
+            'recorded_at': row.recorded_at.isoformat(),
+            'device_timestamp': row.device_timestamp,
+        }
+        for f in fields:
+            item[f] = getattr(row, f)
+        readings.append(item)
+    return readings
+
+
+def _ensure_writer() -> None:
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return
+    with _writer_lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(target=_writer_loop, name='sensor-history-writer', daemon=True)
+            _writer.start()
+
+
+def _writer_loop() -> None:
+    while True:
+        _wakeup.wait(FLUSH_INTERVAL)
+        _wakeup.clear()
+        flush()
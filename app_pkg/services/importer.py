@@ -0,0 +1,200 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..extensions import db
+from ..models import LOCALES, Patient, VitalReading
+from ..utils import parse_time
+from .patients import CSV_COLUMNS, CSV_VITALS_COLUMNS, PATIENT_FIELDS, READING_FIELDS
+
+
+# Rows per INSERT executemany and per commit
+IMPORT_CHUNK_SIZE = 500
+# Per-row errors beyond this are counted but not listed
+MAX_REPORTED_ERRORS = 100
+
+# The columns the patient table cannot store without
+IMPORT_REQUIRED_FIELDS = ('name', 'age', 'gender', 'contact', 'address')
+INTEGER_FIELDS = ('age', 'painLevel', 'heart_rate')
+FLOAT_FIELDS = ('spo2', 'body_temperature', 'environment_temperature')
+
+# export_csv header -> API key; ID is ignored since imported rows get new ids
+_COLUMN_KEYS = {column: key for key, column in PATIENT_FIELDS.items()}
+CSV_HEADER_KEYS = {
+    header: _COLUMN_KEYS[column]
+    for header, column in CSV_COLUMNS + CSV_VITALS_COLUMNS
+    if column != 'id'
+}
+
+Row = Tuple[int, Any]
+
+
+class RowError(ValueError):
+    """A row that cannot be imported; the message is reported back with its row number."""
+
+
+def json_rows(items: List[Any]) -> Iterator[Row]:
+    return enumerate(items, 1)
+
+
+def ndjson_rows(stream: IO[bytes]) -> Iterator[Row]:
+    """Objects from a newline-delimited JSON stream, numbered by line. Blank lines are skipped."""
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, RowError(f'Invalid JSON: {e}')
+
+
+def csv_rows(stream: IO[bytes]) -> Iterator[Row]:
+    """Rows of a CSV in export_csv's layout, as API-keyed dicts numbered by line.
+
+    The header is checked up front, so a file missing required columns raises
+    ValueError before anything is imported.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    headers = reader.fieldnames or []
+    present = {CSV_HEADER_KEYS[h] for h in headers if h in CSV_HEADER_KEYS}
+    missing = [h for h, key in CSV_HEADER_KEYS.items() if key in IMPORT_REQUIRED_FIELDS and key not in present]
+    if missing:
+        raise ValueError(f"CSV is missing column(s): {', '.join(missing)}")
+
+    def rows() -> Iterator[Row]:
+        for record in reader:
+            data = {CSV_HEADER_KEYS[h]: v for h, v in record.items() if h in CSV_HEADER_KEYS and v != ''}
+            yield reader.line_num, data
+
+    return rows()
+
+
+def validate_row(data: Any) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """Turn one API-keyed record into (patient columns, vital reading columns or None).
+
+    Raises RowError describing the first problem found.
+    """
+    if isinstance(data, RowError):
+        raise data
+    if not isinstance(data, dict):
+        raise RowError('Expected an object')
+    for key in IMPORT_REQUIRED_FIELDS:
+        if data.get(key) in (None, ''):
+            raise RowError(f'Missing field: {key}')
+
+    values = {}
+    for key, column in PATIENT_FIELDS.items():
+        if key == 'id':
+            continue
+        value = data.get(key)
+        if value is None or value == '':
+            value = None
+        elif key in INTEGER_FIELDS:
+            value = _number(key, value, int)
+        elif key in FLOAT_FIELDS:
+            value = _number(key, value, float)
+        elif key != 'locale':
+            value = str(value)
+        values[column] = value
+
+    locale = values['locale'] or 'en'
+    if locale not in LOCALES:
+        raise RowError(f'Unknown locale: {locale}')
+    values['locale'] = locale
+    try:
+        values['timestamp'] = parse_time(str(data['timestamp'])) if data.get('timestamp') else datetime.utcnow()
+    except ValueError:
+        raise RowError(f"Invalid timestamp: {data['timestamp']}")
+
+    reading = {field: values.pop(field) for field in READING_FIELDS}
+    if all(value is None for value in reading.values()):
+        reading = None
+    else:
+        reading['timestamp'] = values['timestamp']
+    return values, reading
+
+
+def import_rows(rows: Iterable[Row]) -> Dict[str, Any]:
+    """Validate rows in one streaming pass and insert the valid ones in chunks.
+
+    Each chunk is its own transaction. If a chunk fails in the database, its
+    rows are retried one at a time so only the offending rows are reported.
+    Returns {"imported", "failed", "errors": [{"row", "message"}, ...]}.
+    """
+    imported = 0
+    errors: List[Tuple[Optional[int], str]] = []
+    chunk: List[Tuple[int, Dict[str, Any], Optional[Dict[str, Any]]]] = []
+
+    source = iter(rows)
+    while True:
+        try:
+            number, data = next(source)
+        except StopIteration:
+            break
+        except (ValueError, csv.Error) as e:
+            # Undecodable input: keep what was imported and stop here
+            errors.append((None, f'Stopped reading input: {e}'))
+            break
+
+        try:
+            patient, reading = validate_row(data)
+        except RowError as e:
+            errors.append((number, str(e)))
+            continue
+        chunk.append((number, patient, reading))
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            imported += _insert_chunk(chunk, errors)
+            chunk = []
+    if chunk:
+        imported += _insert_chunk(chunk, errors)
+
+    return {
+        'imported': imported,
+        'failed': len(errors),
+        'errors': [{'row': number, 'message': message} for number, message in errors[:MAX_REPORTED_ERRORS]],
+    }
+
+
+def _insert_chunk(chunk, errors: List[Tuple[Optional[int], str]]) -> int:
+    try:
+        _write(chunk)
+        db.session.commit()
+        return len(chunk)
+    except SQLAlchemyError:
+        db.session.rollback()
+
+    imported = 0
+    for item in chunk:
+        try:
+            _write([item])
+            db.session.commit()
+            imported += 1
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            errors.append((item[0], str(getattr(e, 'orig', None) or e)))
+    return imported
+
+
+def _write(chunk) -> None:
+    # One executemany for the patients; RETURNING hands back ids in parameter order
+    ids = db.session.execute(
+        insert(Patient).returning(Patient.id, sort_by_parameter_order=True),
+        [patient for _, patient, _ in chunk],
+    ).scalars().all()
+    readings = [dict(reading, patient_id=patient_id) for patient_id, (_, _, reading) in zip(ids, chunk) if reading]
+    if readings:
+        db.session.execute(insert(VitalReading), readings)
+
+
+def _number(key: str, value: Any, kind):
+    if isinstance(value, bool):
+        raise RowError(f'Invalid {key}: {value}')
+    try:
+        return kind(float(value)) if kind is int else kind(value)
+    except (TypeError, ValueError, OverflowError):
+        raise RowError(f'Invalid {key}: {value}')
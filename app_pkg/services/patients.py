@@ -0,0 +1,429 @@
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, event, func, inspect, literal, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import (
+    LOCALES, PATIENT_FTS_COLUMNS, PATIENT_FTS_TABLE, PATIENTS_VERSION, DataVersion, Patient, VitalReading,
+)
+
+
+# API key -> column, in the order the API has always returned them. Vitals
+# (READING_FIELDS) come from the patient's latest VitalReading.
+PATIENT_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'age': 'age',
+    'gender': 'gender',
+    'contact': 'contact',
+    'address': 'address',
+    'chiefComplaint': 'chief_complaint',
+    'painLevel': 'pain_level',
+    'painDescription': 'pain_description',
+    'additionalSymptoms': 'additional_symptoms',
+    'medicalHistory': 'medical_history',
+    'emergencyName': 'emergency_name',
+    'emergencyRelation': 'emergency_relation',
+    'emergencyGender': 'emergency_gender',
+    'emergencyContact': 'emergency_contact',
+    'emergencyAddress': 'emergency_address',
+    'photoFilename': 'photo_filename',
+    'heart_rate': 'heart_rate',
+    'spo2': 'spo2',
+    'body_temperature': 'body_temperature',
+    'environment_temperature': 'environment_temperature',
+    'locale': 'locale',
+}
+# Payload keys /submit_patient_data requires; the other PATIENT_FIELDS are optional
+REQUIRED_FIELDS = (
+    'name', 'age', 'gender', 'contact', 'address',
+    'chiefComplaint', 'painLevel', 'painDescription', 'additionalSymptoms', 'medicalHistory',
+    'emergencyName', 'emergencyRelation', 'emergencyGender', 'emergencyContact', 'emergencyAddress',
+)
+OPTIONAL_FIELDS = ('photoFilename', 'heart_rate', 'spo2', 'body_temperature', 'environment_temperature')
+READING_FIELDS = ('heart_rate', 'spo2', 'body_temperature', 'environment_temperature')
+# Projectable on request but not part of the default payload
+EXTRA_FIELDS = {
+    'timestamp': 'timestamp',
+}
+
+# Sort keys must be non-null so (value, id) keyset cursors are total
+SORT_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'age': 'age',
+    'timestamp': 'timestamp',
+}
+
+MAX_PAGE_SIZE = 500
+SEARCH_LIMIT = 50
+MAX_READINGS = 10000
+
+# CSV header -> column for /export_csv
+CSV_COLUMNS = [
+    ('ID', 'id'),
+    ('Name', 'name'),
+    ('Age', 'age'),
+    ('Gender', 'gender'),
+    ('Contact', 'contact'),
+    ('Address', 'address'),
+    ('Chief Complaint', 'chief_complaint'),
+    ('Pain Level', 'pain_level'),
+    ('Pain Description', 'pain_description'),
+    ('Additional Symptoms', 'additional_symptoms'),
+    ('Medical History', 'medical_history'),
+    ('Emergency Name', 'emergency_name'),
+    ('Emergency Relation', 'emergency_relation'),
+    ('Emergency Gender', 'emergency_gender'),
+    ('Emergency Contact', 'emergency_contact'),
+    ('Emergency Address', 'emergency_address'),
+    ('Photo Filename', 'photo_filename'),
+    ('Locale', 'locale'),
+]
+CSV_VITALS_COLUMNS = [
+    ('Heart Rate', 'heart_rate'),
+    ('SpO2', 'spo2'),
+    ('Body Temperature', 'body_temperature'),
+    ('Environment Temperature', 'environment_temperature'),
+]
+CSV_BATCH_SIZE = 500
+
+
+_TRACKED = (Patient, VitalReading)
+
+# Engine -> whether the FTS5 table exists (SQLite with FTS5 only)
+_fts_available: Dict[Any, bool] = {}
+_DIRTY_KEY = 'patients_changed'
+
+
+def get_version() -> str:
+    """Change counter of the patient tables, served as the ETag of patient listings.
+
+    Kept in the data_version table and bumped in the same transaction as the
+    change, so every worker process agrees on it. Read before the listing is
+    built: a concurrent write can only make the tag older than the data, which
+    costs one extra 200, never a stale 304.
+    """
+    return str(db.session.execute(
+        select(DataVersion.version).where(DataVersion.name == PATIENTS_VERSION)
+    ).scalar())
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flush(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _TRACKED):
+            session.info[_DIRTY_KEY] = True
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk(orm_execute_state):
+    # Covers insert()/update()/delete() statements that bypass the unit of work
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in _TRACKED:
+        orm_execute_state.session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_on_commit(session):
+    # Flush first so pending objects are counted, then bump inside the same
+    # transaction: the new version becomes visible together with the rows
+    session.flush()
+    if session.info.pop(_DIRTY_KEY, False):
+        session.execute(
+            update(DataVersion)
+            .where(DataVersion.name == PATIENTS_VERSION)
+            .values(version=DataVersion.version + 1),
+            execution_options={'synchronize_session': False},
+        )
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_on_rollback(session):
+    session.info.pop(_DIRTY_KEY, None)
+
+
+class QueryError(ValueError):
+    """Raised for invalid listing parameters; the message is safe to return to clients."""
+
+
+def patient_from_payload(data: Dict[str, Any], locale: str = 'en') -> Patient:
+    """Build a Patient from an intake payload; raises KeyError for a missing required field.
+
+    Vitals in the payload become the patient's first VitalReading.
+    """
+    values = {PATIENT_FIELDS[key]: data[key] for key in REQUIRED_FIELDS}
+    values.update({PATIENT_FIELDS[key]: data.get(key) for key in OPTIONAL_FIELDS if key not in READING_FIELDS})
+    patient = Patient(locale=locale, **values)
+    reading = reading_from_payload(data)
+    if reading is not None:
+        patient.vitals.append(reading)
+    return patient
+
+
+def reading_from_payload(data: Dict[str, Any]) -> Optional[VitalReading]:
+    """Build a VitalReading from the vitals in `data`, or None if it has none."""
+    values = {field: data.get(field) for field in READING_FIELDS}
+    if all(value is None for value in values.values()):
+        return None
+    return VitalReading(**values)
+
+
+def add_reading(patient_id: int, data: Dict[str, Any], timestamp: Optional[datetime] = None) -> Optional[VitalReading]:
+    """Stage a new reading for `patient_id`; the caller commits. Returns None if `data` has no vitals."""
+    reading = reading_from_payload(data)
+    if reading is not None:
+        reading.patient_id = patient_id
+        if timestamp is not None:
+            reading.timestamp = timestamp
+        db.session.add(reading)
+    return reading
+
+
+def list_readings(
+    patient_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """A patient's readings in time order: one range scan of ix_vital_reading_patient_timestamp."""
+    q = db.session.query(VitalReading.timestamp, *(getattr(VitalReading, f) for f in READING_FIELDS))
+    q = q.filter(VitalReading.patient_id == patient_id)
+    if start is not None:
+        q = q.filter(VitalReading.timestamp >= start)
+    if end is not None:
+        q = q.filter(VitalReading.timestamp <= end)
+    limit = MAX_READINGS if limit is None else max(1, min(limit, MAX_READINGS))
+    rows = q.order_by(VitalReading.timestamp, VitalReading.id).limit(limit).all()
+    return [{key: _serialize(value) for key, value in row._mapping.items()} for row in rows]
+
+
+def check_locale(locale: Optional[str]) -> Optional[str]:
+    """Validate a locale filter; None and 'all' mean every locale."""
+    if locale in (None, '', 'all'):
+        return None
+    if locale not in LOCALES:
+        raise QueryError(f"Unknown locale: {locale}")
+    return locale
+
+
+def patient_to_dict(patient, fields: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    fields = fields or list(PATIENT_FIELDS)
+    columns = {**PATIENT_FIELDS, **EXTRA_FIELDS}
+    reading = None
+    if any(columns[f] in READING_FIELDS for f in fields):
+        reading = patient.vitals.order_by(None).order_by(
+            VitalReading.timestamp.desc(), VitalReading.id.desc()).first()
+    return {
+        f: _serialize(getattr(reading, columns[f], None) if columns[f] in READING_FIELDS
+                      else getattr(patient, columns[f]))
+        for f in fields
+    }
+
+
+def parse_fields(value: Optional[str]) -> List[str]:
+    if not value:
+        return list(PATIENT_FIELDS)
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    unknown = [f for f in fields if f not in PATIENT_FIELDS and f not in EXTRA_FIELDS]
+    if unknown:
+        raise QueryError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def list_patients(
+    fields: Sequence[str],
+    locale: Optional[str] = None,
+    name_prefix: Optional[str] = None,
+    contact_prefix: Optional[str] = None,
+    search: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    pain_min: Optional[int] = None,
+    pain_max: Optional[int] = None,
+    sort: str = 'id',
+    descending: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Filtered, keyset-paginated listing that only loads the requested columns.
+
+    `search` matches a name or contact prefix, or words in the complaint,
+    symptoms and history text. Returns (rows, next_cursor); next_cursor is None on the last page or when
+    `limit` is None (unpaginated).
+    """
+    if sort not in SORT_FIELDS:
+        raise QueryError(f"Cannot sort by '{sort}', expected one of {', '.join(SORT_FIELDS)}")
+    sort_col = getattr(Patient, SORT_FIELDS[sort])
+    columns = {**PATIENT_FIELDS, **EXTRA_FIELDS}
+
+    # Always select id and the sort column so the cursor can be built
+    selected = list(dict.fromkeys(['id', *(columns[f] for f in fields), SORT_FIELDS[sort]]))
+    q = _select_columns(selected)
+
+    if locale is not None:
+        q = q.filter(Patient.locale == locale)
+    if name_prefix:
+        q = q.filter(_name_prefix(name_prefix))
+    if contact_prefix:
+        q = q.filter(_prefix(Patient.contact, literal(contact_prefix)))
+    if search and search.strip():
+        q = q.filter(_search_filter(search.strip()))
+    if start is not None:
+        q = q.filter(Patient.timestamp >= start)
+    if end is not None:
+        q = q.filter(Patient.timestamp <= end)
+    if pain_min is not None:
+        q = q.filter(Patient.pain_level >= pain_min)
+    if pain_max is not None:
+        q = q.filter(Patient.pain_level <= pain_max)
+
+    if cursor:
+        last_value, last_id = _decode_cursor(cursor, sort)
+        if descending:
+            q = q.filter(or_(sort_col < last_value, and_(sort_col == last_value, Patient.id < last_id)))
+        else:
+            q = q.filter(or_(sort_col > last_value, and_(sort_col == last_value, Patient.id > last_id)))
+
+    if descending:
+        q = q.order_by(sort_col.desc(), Patient.id.desc())
+    else:
+        q = q.order_by(sort_col, Patient.id)
+
+    page_size = None if limit is None else max(1, min(limit, MAX_PAGE_SIZE))
+    if page_size is not None:
+        # One extra row tells us whether another page exists
+        q = q.limit(page_size + 1)
+    rows = q.all()
+
+    next_cursor = None
+    if page_size is not None and len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = _encode_cursor(getattr(last, SORT_FIELDS[sort]), last.id)
+
+    return [{f: _serialize(getattr(row, columns[f])) for f in fields} for row in rows], next_cursor
+
+
+def iter_csv(
+    locale: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    include_vitals: bool = False,
+) -> Iterator[str]:
+    """Yield the patient export as CSV text, one chunk per CSV_BATCH_SIZE rows.
+
+    Rows are read with yield_per so memory stays flat regardless of table size.
+    """
+    columns = CSV_COLUMNS + (CSV_VITALS_COLUMNS if include_vitals else [])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain() -> str:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writerow([name for name, _ in columns])
+    yield drain()
+
+    q = _select_columns([attr for _, attr in columns])
+    if locale is not None:
+        q = q.filter(Patient.locale == locale)
+    if start is not None:
+        q = q.filter(Patient.timestamp >= start)
+    if end is not None:
+        q = q.filter(Patient.timestamp <= end)
+    count = 0
+    for row in q.order_by(Patient.id).yield_per(CSV_BATCH_SIZE):
+        writer.writerow(row)
+        count += 1
+        if count % CSV_BATCH_SIZE == 0:
+            yield drain()
+    chunk = drain()
+    if chunk:
+        yield chunk
+
+
+def _prefix(column, prefix):
+    # A range rather than LIKE so the planner can always use the index
+    return and_(column >= prefix, column < prefix.concat('\U0010ffff'))
+
+
+def _name_prefix(prefix: str):
+    # Matches ix_patient_name_lower
+    return _prefix(func.lower(Patient.name), func.lower(literal(prefix)))
+
+
+def _search_filter(term: str):
+    clauses = [_name_prefix(term), _prefix(Patient.contact, literal(term))]
+    if _has_fts():
+        # Every word must match, each as a prefix; quoting keeps user input out of FTS syntax
+        words = term.replace('"', ' ').split()
+        if words:
+            match = ' '.join(f'"{word}"*' for word in words)
+            clauses.append(text(
+                f'patient.id IN (SELECT rowid FROM {PATIENT_FTS_TABLE} WHERE {PATIENT_FTS_TABLE} MATCH :fts_match)'
+            ).bindparams(fts_match=match))
+    else:
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        clauses.extend(
+            getattr(Patient, column).ilike(f'%{escaped}%', escape='\\') for column in PATIENT_FTS_COLUMNS
+        )
+    return or_(*clauses)
+
+
+def _has_fts() -> bool:
+    engine = db.engine
+    if engine not in _fts_available:
+        _fts_available[engine] = engine.dialect.name == 'sqlite' and inspect(engine).has_table(PATIENT_FTS_TABLE)
+    return _fts_available[engine]
+
+
+def _select_columns(names: Sequence[str]):
+    """Query Patient columns by name, joining each patient's latest reading if vitals are asked for."""
+    q = db.session.query(*(
+        getattr(VitalReading if name in READING_FIELDS else Patient, name) for name in names
+    ))
+    if any(name in READING_FIELDS for name in names):
+        # Correlated LIMIT 1 lookup: one index seek per patient, not a scan of all readings
+        latest = (
+            select(VitalReading.id)
+            .where(VitalReading.patient_id == Patient.id)
+            .order_by(VitalReading.timestamp.desc(), VitalReading.id.desc())
+            .limit(1)
+            .correlate(Patient)
+            .scalar_subquery()
+        )
+        q = q.select_from(Patient).outerjoin(VitalReading, VitalReading.id == latest)
+    return q
+
+
+def _serialize(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _encode_cursor(value: Any, row_id: int) -> str:
+    raw = json.dumps([_serialize(value), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str, sort: str) -> Tuple[Any, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if sort == 'timestamp':
+            value = datetime.fromisoformat(value)
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise QueryError('Invalid cursor')
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def normalize_prompt(text: str) -> str:
+    """Case- and whitespace-insensitive form of a question, ignoring trailing punctuation."""
+    return ' '.join(text.casefold().split()).rstrip(' ?!.')
+
+
+def prompt_key(prompt: str, model: str, temperature: float) -> str:
+    raw = json.dumps([normalize_prompt(prompt), model, temperature])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResponseCache:
+    """In-memory LRU of responses with a TTL, optionally mirrored to a SQLite file.
+
+    With `path` set, entries are written through on insert, deleted on
+    eviction, and reloaded at startup, so common answers survive restarts.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 24 * 3600, path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.path = path
+        # key -> (stored_at, value), least recently used first
+        self._entries: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._open(path)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                self._delete(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: str) -> None:
+        stored_at = time.time()
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO response_cache (key, value, stored_at) VALUES (?, ?, ?)',
+                    (key, value, stored_at),
+                )
+                self._db.commit()
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._delete(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM response_cache')
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'persistent': self._db is not None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _open(self, path: str) -> None:
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS response_cache '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)'
+        )
+        self._db.execute('DELETE FROM response_cache WHERE stored_at < ?', (time.time() - self.ttl,))
+        # Newest last so the most recent answers survive if the file holds more than fits
+        rows = self._db.execute('SELECT key, value, stored_at FROM response_cache ORDER BY stored_at').fetchall()
+        for key, value, stored_at in rows[-self.max_entries:]:
+            self._entries[key] = (stored_at, value)
+        for key, _, _ in rows[:-self.max_entries]:
+            self._db.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+        self._db.commit()
+
+    def _delete(self, key: str) -> None:
+        # Caller holds self._lock
+        if self._db is not None:
+            self._db.execute('DELETE FROM response_cache WHERE key = ?', (key,))
+            self._db.commit()
@@ -1,37 +1,133 @@
-from typing import Dict, Any
+import time
+from threading import Condition, Lock
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from . import history
 
 
-_latest_data: Dict[str, Any] = {
-    'heart_rate': 0,
-    'spo2': 0,
-    'body_temperature': 0,
-    'environment_temperature': 0,
-    'humidity': 0,
-    'distance': 0,
-    'weight': 0,
-    'timestamp': 0
-}
+DEFAULT_DEVICE = 'default'
+
+SENSOR_FIELDS = history.VITAL_FIELDS + ('timestamp',)
+
+
+class DeviceState:
+    """Latest readings for one device."""
+    __slots__ = SENSOR_FIELDS + ('device_id', 'servo1_angle', 'servo2_angle', 'updated_at', 'version')
+
+    def __init__(self, device_id: str) -> None:
+        self.device_id = device_id
+        for field in SENSOR_FIELDS:
+            setattr(self, field, 0)
+        self.servo1_angle: Optional[int] = None
+        self.servo2_angle: Optional[int] = None
+        self.updated_at = 0.0
+        self.version = 0
+
+    def update(self, data: Dict[str, Any]) -> None:
+        for field in SENSOR_FIELDS:
+            if field in data:
+                setattr(self, field, data[field])
+        self.updated_at = time.time()
+        self.version += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {field: getattr(self, field) for field in SENSOR_FIELDS}
+        result['device_id'] = self.device_id
+        if self.servo1_angle is not None:
+            result['servo1_angle'] = self.servo1_angle
+            result['servo2_angle'] = self.servo2_angle
+        return result
+
+
+_devices: Dict[str, DeviceState] = {}
+_devices_lock = Lock()
+_changed = Condition(_devices_lock)
+_last_device: Optional[str] = None
+_version = 0
+# Distinguishes versions across restarts, since counters start again from zero
+_boot_id = format(time.time_ns(), 'x')
+
+
+def _device_key(device_id: Optional[Any]) -> str:
+    return str(device_id) if device_id else DEFAULT_DEVICE
+
+
+def _get_or_create(device_id: str) -> DeviceState:
+    # Caller holds _devices_lock
+    state = _devices.get(device_id)
+    if state is None:
+        state = _devices[device_id] = DeviceState(device_id)
+    return state
+
+
+def _bump_version() -> None:
+    # Caller holds _devices_lock
+    global _version
+    _version += 1
+    _changed.notify_all()
 
 
 def update_sensor_data(data: Dict[str, Any]) -> None:
-    global _latest_data
-    _latest_data['heart_rate'] = data.get('heart_rate', _latest_data['heart_rate'])
-    _latest_data['spo2'] = data.get('spo2', _latest_data['spo2'])
-    _latest_data['body_temperature'] = data.get('body_temperature', _latest_data['body_temperature'])
-    _latest_data['environment_temperature'] = data.get('environment_temperature', _latest_data['environment_temperature'])
-    _latest_data['humidity'] = data.get('humidity', _latest_data['humidity'])
-    _latest_data['distance'] = data.get('distance', _latest_data['distance'])
-    _latest_data['weight'] = data.get('weight', _latest_data['weight'])
-    _latest_data['timestamp'] = data.get('timestamp', _latest_data['timestamp'])
+    global _last_device
+    device_id = _device_key(data.get('device_id'))
+    with _devices_lock:
+        _get_or_create(device_id).update(data)
+        _last_device = device_id
+        _bump_version()
+    history.record(device_id, data)
+
+
+def update_sensor_data_many(readings: Iterable[Dict[str, Any]]) -> int:
+    count = 0
+    for data in readings:
+        update_sensor_data(data)
+        count += 1
+    return count
+
+
+def update_servo_angles(servo1: int, servo2: int, device_id: Optional[str] = None) -> None:
+    with _devices_lock:
+        state = _get_or_create(_device_key(device_id or _last_device))
+        state.servo1_angle = int(servo1)
+        state.servo2_angle = int(servo2)
+        state.version += 1
+        _bump_version()
+
+
+def wait_for_update(since_version: int, timeout: float) -> int:
+    """Block until the state version moves past `since_version` or `timeout` expires.
+
+    Returns the current version, which equals `since_version` on timeout.
+    """
+    with _changed:
+        _changed.wait_for(lambda: _version != since_version, timeout)
+        return _version
+
 
+def get_latest_data(device_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Latest readings for `device_id`, or for the most recently updated device.
 
-def update_servo_angles(servo1: int, servo2: int) -> None:
-    global _latest_data
-    _latest_data['servo1_angle'] = int(servo1)
-    _latest_data['servo2_angle'] = int(servo2)
+    Returns None for an unknown explicit device id.
+    """
+    return get_latest_snapshot(device_id)[1]
 
 
-def get_latest_data() -> Dict[str, Any]:
-    return _latest_data
+def get_latest_snapshot(device_id: Optional[str] = None) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Like get_latest_data, paired with a version tag that changes whenever the data does."""
+    with _devices_lock:
+        if device_id is None:
+            state = _devices.get(_device_key(_last_device))
+            if state is None:
+                return f'{_boot_id}-0', DeviceState(DEFAULT_DEVICE).to_dict()
+            return f'{_boot_id}-{_version}', state.to_dict()
+        state = _devices.get(device_id)
+        if state is None:
+            return f'{_boot_id}-0', None
+        return f'{_boot_id}-d{state.version}', state.to_dict()
 
 
+def list_devices() -> List[Dict[str, Any]]:
+    with _devices_lock:
+        return [
+            {'device_id': s.device_id, 'updated_at': s.updated_at, 'timestamp': s.timestamp}
+            for s in _devices.values()
+        ]
@@ -0,0 +1,168 @@
+import atexit
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import serial
+from serial_reader import parse_sensor_data
+
+from . import sensors
+
+
+BAUD_RATE = 115200
+READ_TIMEOUT = 0.25
+RECONNECT_DELAY = 2.0
+MAX_LINE_LENGTH = 4096
+
+_readers: Dict[str, 'ReaderHandle'] = {}
+_readers_lock = threading.Lock()
+
+
+class ReaderRunningError(Exception):
+    """A reader is already running on the requested port."""
+
+
+class ReaderHandle:
+    """A serial port read by a dedicated thread that feeds the sensors service."""
+
+    def __init__(self, port: str, baud_rate: int = BAUD_RATE, device_id: Optional[str] = None):
+        self.port = port
+        self.baud_rate = baud_rate
+        self.device_id = device_id or port
+        self.started_at = time.time()
+        self.lines = 0
+        self.readings = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_reading_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._serial: Optional[serial.Serial] = None
+        self._thread = threading.Thread(target=self._run, name=f'serial-reader-{port}', daemon=True)
+
+    def start(self) -> None:
+        # Open synchronously so a bad port is reported to the caller
+        self._serial = serial.Serial(self.port, self.baud_rate, timeout=READ_TIMEOUT)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+        self._close()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'port': self.port,
+            'device_id': self.device_id,
+            'baud_rate': self.baud_rate,
+            'running': self.running,
+            'connected': self._serial is not None,
+            'started_at': self.started_at,
+            'lines': self.lines,
+            'readings': self.readings,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'last_reading_at': self.last_reading_at,
+        }
+
+    def _close(self) -> None:
+        ser, self._serial = self._serial, None
+        if ser is not None:
+            try:
+                ser.close()
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        buffer = bytearray()
+        while not self._stop.is_set():
+            try:
+                if self._serial is None:
+                    self._serial = serial.Serial(self.port, self.baud_rate, timeout=READ_TIMEOUT)
+                    buffer.clear()
+                # Blocks until the first byte arrives, then drains what is buffered
+                chunk = self._serial.read(self._serial.in_waiting or 1)
+            except (serial.SerialException, OSError) as e:
+                self.errors += 1
+                self.last_error = str(e)
+                self._close()
+                self._stop.wait(RECONNECT_DELAY)
+                continue
+
+            if not chunk:
+                continue
+            buffer.extend(chunk)
+            if b'\n' not in chunk:
+                if len(buffer) > MAX_LINE_LENGTH:
+                    buffer.clear()
+                continue
+
+            *lines, rest = buffer.split(b'\n')
+            buffer = bytearray(rest)
+            for raw in lines:
+                self._handle_line(raw.decode('utf-8', errors='ignore').strip())
+
+        self._close()
+
+    def _handle_line(self, line: str) -> None:
+        if not line:
+            return
+        self.lines += 1
+        data = parse_sensor_data(line)
+        if data is None:
+            return
+        data['device_id'] = self.device_id
+        try:
+            sensors.update_sensor_data(data)
+            self.readings += 1
+            self.last_reading_at = time.time()
+        except Exception as e:
+            self.errors += 1
+            self.last_error = str(e)
+
+
+def start_reader(port: str, baud_rate: int = BAUD_RATE, device_id: Optional[str] = None) -> ReaderHandle:
+    """Start reading `port`; raises ReaderRunningError if it is already being read."""
+    with _readers_lock:
+        existing = _readers.get(port)
+        if existing is not None and existing.running:
+            raise ReaderRunningError(f'Serial reader already running on {port}')
+        handle = ReaderHandle(port, baud_rate, device_id)
+        handle.start()
+        _readers[port] = handle
+    return handle
+
+
+def stop_reader(port: str) -> bool:
+    with _readers_lock:
+        handle = _readers.pop(port, None)
+    if handle is None:
+        return False
+    handle.stop()
+    return True
+
+
+def stop_all() -> List[str]:
+    with _readers_lock:
+        handles = list(_readers.values())
+        _readers.clear()
+    for handle in handles:
+        handle.stop()
+    return [handle.port for handle in handles]
+
+
+def get_reader(port: str) -> Optional[ReaderHandle]:
+    with _readers_lock:
+        return _readers.get(port)
+
+
+def list_readers() -> List[Dict[str, Any]]:
+    with _readers_lock:
+        handles = list(_readers.values())
+    return [handle.to_dict() for handle in handles]
+
+
+atexit.register(stop_all)
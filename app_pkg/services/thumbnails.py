@@ -0,0 +1,84 @@
+import hashlib
+import os
+import threading
+from typing import Dict, Optional, Tuple
+import cv2
+from ..utils import atomic_write
+
+
+UPLOAD_DIR = os.path.join('static', 'uploads')
+THUMB_DIR = os.path.join(UPLOAD_DIR, 'thumbs')
+THUMB_WIDTHS = (120, 320)
+DEFAULT_WIDTH = THUMB_WIDTHS[0]
+THUMB_QUALITY = 80
+
+# (path, mtime_ns, size) -> content digest, so unchanged uploads are hashed once
+_digests: Dict[Tuple[str, int, int], str] = {}
+_digests_lock = threading.Lock()
+
+
+def thumbnail_name(digest: str, width: int) -> str:
+    return f'{digest}_{width}.jpg'
+
+
+def get_thumbnail(filename: str, width: int = DEFAULT_WIDTH) -> Optional[str]:
+    """Name of the cached thumbnail for an upload, generating it on first request.
+
+    Thumbnails are named after the upload's content hash, so a name never
+    refers to different bytes and can be cached forever. Returns None if the
+    upload does not exist or cannot be decoded.
+    """
+    source = _upload_path(filename)
+    if source is None:
+        return None
+    digest = _digest(source)
+    name = thumbnail_name(digest, width)
+    if not os.path.exists(os.path.join(THUMB_DIR, name)):
+        frame = cv2.imread(source)
+        if frame is None:
+            return None
+        _write(frame, name, width)
+    return name
+
+
+def create_thumbnails(filename: str, frame) -> None:
+    """Write every standard thumbnail for a freshly saved upload from its in-memory frame."""
+    source = _upload_path(filename)
+    if source is None:
+        return
+    digest = _digest(source)
+    for width in THUMB_WIDTHS:
+        name = thumbnail_name(digest, width)
+        if not os.path.exists(os.path.join(THUMB_DIR, name)):
+            _write(frame, name, width)
+
+
+def _upload_path(filename: str) -> Optional[str]:
+    # Only plain filenames directly inside the uploads folder
+    if not filename or os.path.basename(filename) != filename or filename.startswith('.'):
+        return None
+    path = os.path.join(UPLOAD_DIR, filename)
+    return path if os.path.isfile(path) else None
+
+
+def _digest(path: str) -> str:
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _digests_lock:
+        digest = _digests.get(key)
+    if digest is None:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:20]
+        with _digests_lock:
+            _digests[key] = digest
+    return digest
+
+
+def _write(frame, name: str, width: int) -> None:
+    height, source_width = frame.shape[:2]
+    if width < source_width:
+        frame = cv2.resize(frame, (width, max(1, height * width // source_width)), interpolation=cv2.INTER_AREA)
+    atomic_write(
+        os.path.join(THUMB_DIR, name),
+        lambda path: cv2.imwrite(path, frame, [cv2.IMWRITE_JPEG_QUALITY, THUMB_QUALITY]),
+    )
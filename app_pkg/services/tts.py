@@ -0,0 +1,252 @@
+import atexit
+import heapq
+import itertools
+import re
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import pyttsx3 as t
+
+
+SPEECH_RATE = 150
+# Sentences waiting to be spoken; beyond this the least urgent are dropped
+MAX_QUEUED_SENTENCES = 32
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITIES = {'high': PRIORITY_HIGH, 'normal': PRIORITY_NORMAL}
+# How long a request waits for the engine to start on first use
+ENGINE_INIT_TIMEOUT = 10.0
+
+# Sentence end: . ! ? or the Devanagari danda, followed by whitespace
+_SENTENCE_END = re.compile(r'(?<=[.!?।])\s+')
+
+
+def split_sentences(text: str) -> Tuple[List[str], str]:
+    """Split off complete sentences; returns (sentences, unfinished remainder)."""
+    parts = _SENTENCE_END.split(text)
+    return [p.strip() for p in parts[:-1] if p.strip()], parts[-1]
+
+
+class EngineUnavailable(RuntimeError):
+    """The speech engine could not be started, so nothing can be spoken or rendered."""
+
+
+class Utterance:
+    """Text fed to the speech worker in pieces; each sentence is queued as soon as it is complete."""
+
+    def __init__(self, worker: 'SpeechWorker', generation: int, priority: int):
+        self._worker = worker
+        self.generation = generation
+        self.priority = priority
+        self._pending = ''
+
+    @property
+    def cancelled(self) -> bool:
+        return self._worker.generation != self.generation
+
+    def feed(self, text: str) -> None:
+        sentences, self._pending = split_sentences(self._pending + text)
+        for sentence in sentences:
+            self._worker.put(sentence, self.priority, self.generation)
+
+    def finish(self) -> None:
+        rest, self._pending = self._pending.strip(), ''
+        if rest:
+            self._worker.put(rest, self.priority, self.generation)
+
+
+class SpeechWorker:
+    """The only thread that touches the pyttsx3 engine, fed by a bounded priority queue.
+
+    Starting a new utterance with preempt=True drops everything queued and
+    cuts off the sentence being spoken at its next word.
+    """
+
+    def __init__(self, max_queued: int = MAX_QUEUED_SENTENCES, rate: int = SPEECH_RATE):
+        self.max_queued = max_queued
+        self.rate = rate
+        self.generation = 0
+        # (priority, seq, generation, sentence)
+        self._queue: List[Tuple[int, int, int, str]] = []
+        # Functions to run against the engine on the worker thread, ahead of speech
+        self._calls: Deque[Tuple[Callable[[Any], Any], Future]] = deque()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._speaking = False
+        self._closed = False
+        self._ready = threading.Event()
+        # Why the engine failed to start; once set the worker stays unavailable
+        self.error: Optional[str] = None
+        self.spoken = 0
+        self.dropped = 0
+        self.preempted = 0
+
+    @property
+    def available(self) -> bool:
+        return self.error is None and not self._closed
+
+    def begin(self, priority: int = PRIORITY_NORMAL, preempt: bool = True) -> Utterance:
+        """Start an utterance; raises EngineUnavailable if the engine cannot run."""
+        self._start()
+        with self._cond:
+            if preempt:
+                self._preempt()
+            return Utterance(self, self.generation, priority)
+
+    def speak(self, text: str, priority: int = PRIORITY_NORMAL, preempt: bool = True) -> Utterance:
+        utterance = self.begin(priority, preempt)
+        utterance.feed(text)
+        utterance.finish()
+        return utterance
+
+    def stop(self) -> None:
+        """Drop queued speech and cut off the current sentence."""
+        with self._cond:
+            self._preempt()
+
+    def put(self, sentence: str, priority: int, generation: int) -> bool:
+        with self._cond:
+            if generation != self.generation or self._closed or self.error:
+                return False
+            if len(self._queue) >= self.max_queued:
+                worst = max(self._queue)
+                if priority >= worst[0]:
+                    self.dropped += 1
+                    return False
+                self._queue.remove(worst)
+                heapq.heapify(self._queue)
+                self.dropped += 1
+            heapq.heappush(self._queue, (priority, next(self._seq), generation, sentence))
+            self._cond.notify()
+            return True
+
+    def call(self, fn: Callable[[Any], Any], timeout: Optional[float] = None) -> Any:
+        """Run fn(engine) on the worker thread between sentences and return its result.
+
+        The engine may only be used from its own thread, so anything else that
+        needs it (voice lookup, rendering to a file) goes through here. Raises
+        EngineUnavailable if the engine cannot run.
+        """
+        self._start()
+        future: Future = Future()
+        with self._cond:
+            if not self.available:
+                raise EngineUnavailable(self.error or 'Speech worker is closed')
+            self._calls.append((fn, future))
+            self._ensure_thread()
+            self._cond.notify_all()
+        return future.result(timeout)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._queue and not self._speaking, timeout)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._preempt()
+            while self._calls:
+                self._calls.popleft()[1].set_exception(EngineUnavailable('Speech worker is closed'))
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'available': self.available,
+                'error': self.error,
+                'queued': len(self._queue),
+                'speaking': self._speaking,
+                'spoken': self.spoken,
+                'dropped': self.dropped,
+                'preempted': self.preempted,
+            }
+
+    def _preempt(self) -> None:
+        # Caller holds self._cond
+        if self._queue or self._speaking:
+            self.preempted += 1
+        self.generation += 1
+        self._queue.clear()
+
+    def _start(self) -> None:
+        with self._cond:
+            if not self.available:
+                raise EngineUnavailable(self.error or 'Speech worker is closed')
+            self._ensure_thread()
+        if not self._ready.wait(ENGINE_INIT_TIMEOUT):
+            raise EngineUnavailable('Speech engine did not start in time')
+        if self.error:
+            raise EngineUnavailable(self.error)
+
+    def _fail(self, error: str) -> None:
+        print(error)
+        with self._cond:
+            self.error = error
+            self._queue.clear()
+            while self._calls:
+                self._calls.popleft()[1].set_exception(EngineUnavailable(error))
+            self._cond.notify_all()
+        self._ready.set()
+
+    def _ensure_thread(self) -> None:
+        # Caller holds self._cond
+        if self.error is None and (self._thread is None or not self._thread.is_alive()):
+            self._thread = threading.Thread(target=self._run, name='tts-worker', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        # pyttsx3 engines belong to the thread that created them
+        try:
+            engine = t.init()
+            engine.setProperty('rate', self.rate)
+        except Exception as e:
+            # No driver or audio device; retrying on every request would fail the same way
+            self._fail(f'Speech engine unavailable: {e}')
+            return
+        self._ready.set()
+        current = [0]
+
+        def on_word(name, location, length):
+            # Called on this thread between words, the one place stop() is safe
+            if self._speaking and current[0] != self.generation:
+                engine.stop()
+
+        engine.connect('started-word', on_word)
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._calls or self._closed)
+                if self._closed:
+                    return
+                call = self._calls.popleft() if self._calls else None
+                if call is None:
+                    _, _, generation, sentence = heapq.heappop(self._queue)
+                    if generation != self.generation:
+                        continue
+                    current[0] = generation
+                    self._speaking = True
+            if call is not None:
+                fn, future = call
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(engine))
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            try:
+                engine.say(sentence)
+                engine.runAndWait()
+                self.spoken += 1
+            except Exception as e:
+                print(f"TTS failed: {e}")
+            finally:
+                with self._cond:
+                    self._speaking = False
+                    self._cond.notify_all()
+
+
+worker = SpeechWorker()
+atexit.register(worker.close)
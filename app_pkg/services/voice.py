@@ -1,27 +1,40 @@
+import json
+import os
 from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional
 import requests
+from requests.adapters import HTTPAdapter
 import speech_recognition as sr
-import pyttsx3 as t
+from . import conversation
+from .response_cache import ResponseCache, prompt_key
 
 
-API_KEY = "JJT2oAUiJNKaEzkGAcP0PpzZ1hBoExqz"
-API_URL = "https://api.deepinfra.com/v1/openai/chat/completions"
+# Any OpenAI-compatible chat completions endpoint; point AI_API_URL at a local stub for tests
+API_KEY = os.environ.get('AI_API_KEY', "JJT2oAUiJNKaEzkGAcP0PpzZ1hBoExqz")
+API_URL = os.environ.get('AI_API_URL', "https://api.deepinfra.com/v1/openai/chat/completions")
+AI_MODEL = os.environ.get('AI_MODEL', "meta-llama/Meta-Llama-3-8B-Instruct")
+AI_MAX_TOKENS = int(os.environ.get('AI_MAX_TOKENS', 500))
+AI_CONNECT_TIMEOUT = float(os.environ.get('AI_CONNECT_TIMEOUT', 5))
+# Whole reply for get_ai_response; longest gap between chunks when streaming
+AI_READ_TIMEOUT = float(os.environ.get('AI_READ_TIMEOUT', 15))
+AI_POOL_SIZE = int(os.environ.get('AI_POOL_SIZE', 8))
+AI_TEMPERATURE = 0.7
+SYSTEM_PROMPT = "You are a medical assistant."
 
-tts_lock = Lock()
-mic_lock = Lock()
+# Repeated questions are answered from cache; set AI_CACHE_PATH to keep answers across restarts
+AI_CACHE_SIZE = int(os.environ.get('AI_CACHE_SIZE', 256))
+AI_CACHE_TTL = float(os.environ.get('AI_CACHE_TTL', 24 * 3600))
+AI_CACHE_PATH = os.environ.get('AI_CACHE_PATH') or None
 
-engine = t.init()
-engine.setProperty('rate', 150)
-recognizer = sr.Recognizer()
+TIMEOUT_MESSAGE = "The request timed out. Please try again."
+ERROR_MESSAGE = "AI error: Please try again later."
 
+mic_lock = Lock()
+_session: Optional[requests.Session] = None
+_session_lock = Lock()
+response_cache = ResponseCache(AI_CACHE_SIZE, AI_CACHE_TTL, AI_CACHE_PATH)
 
-def speak_text(text: str) -> None:
-    with tts_lock:
-        try:
-            engine.say(text)
-            engine.runAndWait()
-        except Exception:
-            pass
+recognizer = sr.Recognizer()
 
 
 def process_voice() -> str:
@@ -39,27 +52,103 @@ def process_voice() -> str:
                 return f"Recognition error: {str(e)}"
 
 
-def get_ai_response(user_input: str) -> str:
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type": "application/json"
-    }
+def get_session() -> requests.Session:
+    """Process-wide keep-alive session, so each request skips the TCP/TLS handshake."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update({
+                "Authorization": f"Bearer {API_KEY}",
+                "Content-Type": "application/json",
+            })
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=AI_POOL_SIZE)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+    return _session
+
+
+def _build_prompt(messages: List[Dict[str, str]], stream: bool = False) -> Dict[str, Any]:
     prompt = {
-        "model": "meta-llama/Meta-Llama-3-8B-Instruct",
-        "messages": [
-            {"role": "system", "content": "You are a medical assistant."},
-            {"role": "user", "content": user_input}
-        ],
-        "temperature": 0.7,
-        "max_tokens": 500
+        "model": AI_MODEL,
+        "messages": messages,
+        "temperature": AI_TEMPERATURE,
+        "max_tokens": AI_MAX_TOKENS,
     }
+    if stream:
+        prompt["stream"] = True
+    return prompt
+
+
+def _cache_key(messages: List[Dict[str, str]]) -> Optional[str]:
+    # Only opening questions are cached; follow-ups depend on the conversation so far
+    if len(messages) != 2:
+        return None
+    return prompt_key(messages[-1]["content"], AI_MODEL, AI_TEMPERATURE)
+
+
+def get_ai_response(user_input: str, session_id: Optional[str] = None) -> str:
+    """Answer `user_input`, continuing the conversation of `session_id` if given."""
+    messages = conversation.build_messages(SYSTEM_PROMPT, session_id, user_input)
+    key = _cache_key(messages)
+    cached = response_cache.get(key) if key else None
+    if cached is not None:
+        conversation.record_turn(session_id, user_input, cached)
+        return cached
     try:
-        response = requests.post(API_URL, json=prompt, headers=headers, timeout=15)
+        response = get_session().post(
+            API_URL, json=_build_prompt(messages), timeout=(AI_CONNECT_TIMEOUT, AI_READ_TIMEOUT))
         response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        content = response.json()["choices"][0]["message"]["content"]
+        if key:
+            response_cache.put(key, content)
+        conversation.record_turn(session_id, user_input, content)
+        return content
     except requests.exceptions.Timeout:
-        return "The request timed out. Please try again."
+        return TIMEOUT_MESSAGE
     except requests.exceptions.RequestException:
-        return "AI error: Please try again later."
+        return ERROR_MESSAGE
 
 
+def stream_ai_response(user_input: str, session_id: Optional[str] = None) -> Iterator[str]:
+    """Yield the reply as text deltas while the upstream generates it.
+
+    A cached reply is yielded whole. Raises requests.exceptions.RequestException
+    if the upstream fails; deltas already yielded stand. Closing the generator
+    drops the upstream request, and only complete replies are cached.
+    """
+    messages = conversation.build_messages(SYSTEM_PROMPT, session_id, user_input)
+    key = _cache_key(messages)
+    cached = response_cache.get(key) if key else None
+    if cached is not None:
+        conversation.record_turn(session_id, user_input, cached)
+        yield cached
+        return
+    parts = []
+    with get_session().post(
+        API_URL,
+        json=_build_prompt(messages, stream=True),
+        timeout=(AI_CONNECT_TIMEOUT, AI_READ_TIMEOUT),
+        stream=True,
+    ) as response:
+        response.raise_for_status()
+        # chunk_size=None passes each chunk of a chunked (streaming) reply on as it arrives
+        for line in response.iter_lines(chunk_size=None):
+            if not line.startswith(b'data:'):
+                continue
+            payload = line[len(b'data:'):].strip()
+            if payload == b'[DONE]':
+                break
+            try:
+                choice = json.loads(payload)["choices"][0]
+            except (ValueError, KeyError, IndexError):
+                continue
+            delta = (choice.get("delta") or {}).get("content")
+            if delta:
+                parts.append(delta)
+                yield delta
+    if parts:
+        content = ''.join(parts)
+        if key:
+            response_cache.put(key, content)
+        conversation.record_turn(session_id, user_input, content)
@@ -0,0 +1,71 @@
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+from flask import Response, jsonify, request, send_from_directory
+
+# Content-addressed files never change under the same name
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Accept epoch seconds or an ISO 8601 string; returns naive UTC datetime."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value)
+    else:
+        try:
+            return datetime.utcfromtimestamp(seconds)
+        except (OverflowError, OSError, ValueError):
+            # inf, nan and epochs outside the platform's range
+            raise ValueError(f'Timestamp out of range: {value}')
+    if parsed.tzinfo is not None:
+        try:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        except OverflowError:
+            raise ValueError(f'Timestamp out of range: {value}')
+    return parsed
+
+
+def conditional_json(etag: str, build: Callable[[], Any]) -> Response:
+    """Return 304 if the client already holds `etag`, else jsonify(build()) tagged with it.
+
+    `build` is only called on a miss, so unchanged polls skip serialization entirely.
+    """
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    return response
+
+
+def send_immutable(directory: str, name: str) -> Response:
+    """Serve a content-addressed file with headers that let clients cache it forever."""
+    response = send_from_directory(os.path.abspath(directory), name, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def atomic_write(path: str, write: Callable[[str], Any]) -> bool:
+    """Create `path` by calling write(temp_path) and renaming the result into place.
+
+    The temp file is hidden and in the same folder, so readers never see a
+    partial file. Returns False, leaving `path` untouched, if nothing was written.
+    """
+    directory, name = os.path.split(path)
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f'.{threading.get_ident()}_{name}')
+    try:
+        write(temp_path)
+        if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+            return False
+        os.replace(temp_path, path)
+        return True
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write benchmark for the SQLite settings in app_pkg.config
+Runs the same sensor write storm and dashboard-style reads against a scratch
+database twice: once with SQLite defaults (rollback journal, synchronous=FULL)
+and once with the tuned profile (WAL, pragmas, pool), then prints both
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, exc, insert, select
+
+from app_pkg.config import Config, engine_options
+from app_pkg.database import set_sqlite_pragmas
+from app_pkg.extensions import db
+from app_pkg.models import SensorReading
+
+DEVICES = 4
+SEED_ROWS = 20000
+READ_LIMIT = 100
+
+
+def make_engine(path: str, tuned: bool):
+    uri = f'sqlite:///{path}'
+    if not tuned:
+        return create_engine(uri)
+    engine = create_engine(uri, **engine_options(uri))
+    set_sqlite_pragmas(engine, Config.SQLITE_PRAGMAS)
+    return engine
+
+
+def sample(device: int) -> Dict[str, Any]:
+    return {
+        'device_id': f'device-{device}',
+        'recorded_at': datetime.utcnow(),
+        'heart_rate': 72,
+        'spo2': 98.0,
+        'body_temperature': 36.6,
+        'environment_temperature': 24.0,
+    }
+
+
+def seed(engine) -> None:
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(SensorReading), [sample(i % DEVICES) for i in range(SEED_ROWS)])
+
+
+def run(tuned: bool, writers: int, readers: int, duration: float) -> Dict[str, Any]:
+    """Returns committed writes, completed reads and lock errors per second"""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = make_engine(path, tuned)
+    seed(engine)
+
+    counts = {'writes': 0, 'reads': 0, 'errors': 0}
+    counts_lock = threading.Lock()
+    stop = threading.Event()
+
+    def bump(key: str) -> None:
+        with counts_lock:
+            counts[key] += 1
+
+    def writer(n: int) -> None:
+        # One transaction per reading, the way un-batched /sensor-data posts land
+        while not stop.is_set():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(SensorReading), [sample(n % DEVICES)])
+                bump('writes')
+            except exc.OperationalError:
+                bump('errors')
+
+    def reader(n: int) -> None:
+        query = (
+            select(SensorReading)
+            .where(SensorReading.device_id == f'device-{n % DEVICES}')
+            .order_by(SensorReading.recorded_at.desc())
+            .limit(READ_LIMIT)
+        )
+        while not stop.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(query).fetchall()
+                bump('reads')
+            except exc.OperationalError:
+                bump('errors')
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    engine.dispose()
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+    return {key: value / elapsed for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite default vs tuned concurrency benchmark')
+    parser.add_argument('--writers', type=int, default=4, help='Threads committing one reading at a time')
+    parser.add_argument('--readers', type=int, default=8, help='Threads running the latest-readings query')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per run')
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.duration:.0f}s per run")
+    results = {}
+    for name, tuned in (('default', False), ('tuned', True)):
+        results[name] = run(tuned, args.writers, args.readers, args.duration)
+        r = results[name]
+        print(f"{name:>8}: {r['writes']:8.1f} writes/s  {r['reads']:8.1f} reads/s  {r['errors']:6.1f} errors/s")
+
+    for key in ('writes', 'reads'):
+        before, after = results['default'][key], results['tuned'][key]
+        if before:
+            print(f"{key}: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,9 +3,9 @@
 ESP32 to Flask - continuously sends ESP32 data to Flask app
 """
 
-import requests
 import time
 import random
+from sensor_sender import get_session
 
 def send_esp32_data():
     """Send current ESP32 data to Flask with slight variations"""
@@ -24,8 +24,8 @@ def send_esp32_data():
     }
     
     try:
-        response = requests.post('http://localhost:5000/sensor-data', 
-                               json=data, timeout=2)
+        response = get_session().post('http://localhost:5000/sensor-data', 
+                                      json=data, timeout=2)
         if response.status_code == 200:
             print(f"✅ Data sent at {time.strftime('%H:%M:%S')}")
             return True
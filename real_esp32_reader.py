@@ -5,9 +5,11 @@ Reads actual sensor data from ESP32 and sends to Flask
 """
 
 import serial
-import requests
 import time
 import re
+from sensor_sender import SensorSender
+
+sender = SensorSender()
 
 def parse_esp32_line(line):
     """Parse ESP32 output to extract real sensor values"""
@@ -67,15 +69,8 @@ def parse_esp32_line(line):
     return data
 
 def send_to_flask(data):
-    """Send data to Flask app"""
-    try:
-        response = requests.post('http://localhost:5000/sensor-data', json=data, timeout=2)
-        if response.status_code == 200:
-            print("✅ Data sent to Flask")
-            return True
-    except:
-        pass
-    return False
+    """Queue data for the background sender"""
+    return sender.start().submit(data)
 
 def main():
     print("🔌 ESP32 Real Data Reader")
@@ -123,6 +118,9 @@ def main():
         print("\n🛑 Stopped")
     except Exception as e:
         print(f"❌ Error: {e}")
+    finally:
+        sender.stop()
+        print(sender.format_metrics())
 
 if __name__ == "__main__":
     main()
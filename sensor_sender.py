@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Shared sensor sender for the ESP32 bridge scripts
+Queues readings in memory and posts them to Flask from a background thread
+over one pooled HTTP session, so serial reads never wait on the network
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Configuration
+FLASK_BATCH_URL = 'http://localhost:5000/sensor-data/batch'
+BATCH_SIZE = 20
+FLUSH_INTERVAL = 0.5
+MAX_QUEUE = 1000
+REQUEST_TIMEOUT = 5
+MAX_BACKOFF = 5.0
+
+# What to do with a new reading when the queue is full:
+#   drop_oldest - discard the oldest queued reading (default, keeps data fresh)
+#   drop_newest - discard the incoming reading
+#   coalesce    - merge into the newest queued reading from the same device,
+#                 falling back to drop_oldest when there is none
+POLICIES = ('drop_oldest', 'drop_newest', 'coalesce')
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide keep-alive session"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+    return _session
+
+
+class SensorSender:
+    """Bounded background queue that batches readings to the Flask batch endpoint"""
+
+    def __init__(self, url: str = FLASK_BATCH_URL, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, max_queue: int = MAX_QUEUE,
+                 policy: str = 'drop_oldest', verbose: bool = True):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {POLICIES}")
+        self.url = url
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_queue = max(self.batch_size, max_queue)
+        self.policy = policy
+        self.verbose = verbose
+
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'dropped': 0,
+            'coalesced': 0,
+            'batches': 0,
+            'max_queue_depth': 0,
+            'last_latency_ms': 0.0,
+        }
+
+    def start(self) -> 'SensorSender':
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='sensor-sender', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = REQUEST_TIMEOUT) -> None:
+        """Flush what is queued (best effort) and stop the worker"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, data: Dict[str, Any]) -> bool:
+        """Queue a reading without blocking. Returns False if it was dropped"""
+        with self._cond:
+            self._stats['enqueued'] += 1
+            accepted = True
+            if len(self._queue) >= self.max_queue:
+                accepted = self._apply_policy(data)
+            else:
+                self._queue.append(data)
+            depth = len(self._queue)
+            if depth > self._stats['max_queue_depth']:
+                self._stats['max_queue_depth'] = depth
+            if depth >= self.batch_size:
+                self._cond.notify()
+        return accepted
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats['queue_depth'] = len(self._queue)
+        return stats
+
+    def format_metrics(self) -> str:
+        m = self.metrics()
+        return (f"📈 sent={m['sent']} queued={m['queue_depth']} (max {m['max_queue_depth']}) "
+                f"dropped={m['dropped']} coalesced={m['coalesced']} failed={m['failed']} "
+                f"batches={m['batches']} latency={m['last_latency_ms']:.0f}ms")
+
+    def _apply_policy(self, data: Dict[str, Any]) -> bool:
+        # Caller holds self._cond
+        if self.policy == 'drop_newest':
+            self._stats['dropped'] += 1
+            return False
+        if self.policy == 'coalesce':
+            device = data.get('device_id')
+            for queued in reversed(self._queue):
+                if queued.get('device_id') == device:
+                    queued.update(data)
+                    self._stats['coalesced'] += 1
+                    return True
+        self._queue.popleft()
+        self._queue.append(data)
+        self._stats['dropped'] += 1
+        return True
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        # Caller holds self._cond
+        count = min(self.batch_size, len(self._queue))
+        return [self._queue.popleft() for _ in range(count)]
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        # Put a failed batch back at the front, keeping the newest readings if full
+        with self._cond:
+            room = self.max_queue - len(self._queue)
+            keep = batch[-room:] if room > 0 else []
+            self._stats['dropped'] += len(batch) - len(keep)
+            self._queue.extendleft(reversed(keep))
+
+    def _run(self) -> None:
+        backoff = 0.0
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not self._stopping and len(self._queue) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._stopping and not self._queue:
+                    return
+                batch = self._take_batch()
+
+            if not batch:
+                continue
+            if self._post(batch):
+                backoff = 0.0
+            else:
+                if self._stopping:
+                    return
+                self._requeue(batch)
+                backoff = min(MAX_BACKOFF, backoff * 2 or 0.5)
+                time.sleep(backoff)
+
+    def _post(self, batch: List[Dict[str, Any]]) -> bool:
+        start = time.monotonic()
+        try:
+            response = get_session().post(self.url, json=batch, timeout=REQUEST_TIMEOUT)
+            ok = response.status_code == 200
+            error = None if ok else f"Flask error: {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            ok = False
+            error = f"Connection error: {e}"
+
+        with self._cond:
+            self._stats['last_latency_ms'] = (time.monotonic() - start) * 1000
+            if ok:
+                self._stats['sent'] += len(batch)
+                self._stats['batches'] += 1
+            else:
+                self._stats['failed'] += len(batch)
+
+        if self.verbose:
+            if ok:
+                print(f"✓ Sent {len(batch)} readings to Flask")
+            else:
+                print(f"✗ {error}")
+        return ok
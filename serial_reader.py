@@ -5,15 +5,20 @@ Reads sensor data from ESP32 via USB serial and sends to Flask app
 """
 
 import serial
-import requests
 import time
 import sys
 import argparse
-from typing import Dict, Any
+from typing import Dict, Any, List
+from sensor_sender import (
+    FLASK_BATCH_URL, BATCH_SIZE, FLUSH_INTERVAL, MAX_QUEUE, POLICIES,
+    SensorSender,
+)
 
 # Configuration
 BAUD_RATE = 115200
-FLASK_URL = 'http://localhost:5000/sensor-data'
+STATS_INTERVAL = 10
+READ_TIMEOUT = 0.25  # Max wait for the first byte; bounds idle wakeups, not throughput
+MAX_LINE_LENGTH = 4096
 
 def parse_sensor_data(line: str) -> Dict[str, Any]:
     """Parse sensor data from ESP32 serial output"""
@@ -40,25 +45,43 @@ def parse_sensor_data(line: str) -> Dict[str, Any]:
     
     return None
 
-def send_to_flask(data: Dict[str, Any]) -> bool:
-    """Send sensor data to Flask app"""
-    try:
-        response = requests.post(FLASK_URL, json=data, timeout=5)
-        if response.status_code == 200:
-            print(f"✓ Data sent to Flask: HR={data['heart_rate']}, SpO2={data['spo2']}, Temp={data['body_temperature']:.1f}°C")
-            return True
-        else:
-            print(f"✗ Flask error: {response.status_code}")
-            return False
-    except requests.exceptions.RequestException as e:
-        print(f"✗ Connection error: {e}")
-        return False
+class SerialLineReader:
+    """Event-driven line reader: blocks on the port until bytes arrive, then
+    drains everything already buffered and returns all complete lines"""
+
+    def __init__(self, ser: serial.Serial):
+        self.ser = ser
+        self._buffer = bytearray()
+
+    def read_lines(self) -> List[str]:
+        # read() returns as soon as in_waiting bytes (or the first new byte) are available
+        chunk = self.ser.read(self.ser.in_waiting or 1)
+        if not chunk:
+            return []
+        self._buffer.extend(chunk)
+        if b'\n' not in chunk:
+            if len(self._buffer) > MAX_LINE_LENGTH:
+                self._buffer.clear()
+            return []
+        *lines, rest = self._buffer.split(b'\n')
+        self._buffer = bytearray(rest)
+        return [raw.decode('utf-8', errors='ignore').strip() for raw in lines]
 
 def main():
     """Main serial reader loop"""
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='ESP32 Medical Robot Serial Reader')
     parser.add_argument('--port', required=True, help='Serial port (e.g., COM3, /dev/ttyUSB0)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='Readings per HTTP request (1 sends every reading immediately)')
+    parser.add_argument('--flush-interval', type=float, default=FLUSH_INTERVAL,
+                        help='Max seconds a reading waits in the buffer before being sent')
+    parser.add_argument('--queue-size', type=int, default=MAX_QUEUE,
+                        help='Max readings held while Flask is slow or unreachable')
+    parser.add_argument('--policy', choices=POLICIES, default='drop_oldest',
+                        help='What to do with new readings when the queue is full')
+    parser.add_argument('--stats-interval', type=float, default=STATS_INTERVAL,
+                        help='Seconds between sender metrics lines (0 disables)')
     args = parser.parse_args()
     
     serial_port = args.port
@@ -66,31 +89,38 @@ def main():
     print("=== ESP32 Medical Robot Serial Reader ===")
     print(f"Serial Port: {serial_port}")
     print(f"Baud Rate: {BAUD_RATE}")
-    print(f"Flask URL: {FLASK_URL}")
+    print(f"Flask URL: {FLASK_BATCH_URL} (batch size {args.batch_size}, flush every {args.flush_interval}s)")
     print("Connecting to ESP32...")
     
+    sender = SensorSender(FLASK_BATCH_URL, args.batch_size, args.flush_interval,
+                          args.queue_size, args.policy).start()
+    last_stats = time.monotonic()
+    
     try:
         # Open serial connection
-        ser = serial.Serial(serial_port, BAUD_RATE, timeout=1)
+        ser = serial.Serial(serial_port, BAUD_RATE, timeout=READ_TIMEOUT)
+        reader = SerialLineReader(ser)
         print("✓ Connected to ESP32")
         print("Reading sensor data...\n")
         
         while True:
             try:
-                # Read line from serial
-                line = ser.readline().decode('utf-8').strip()
-                
-                if line:
+                # Block until data arrives; no fixed sleep so fast firmware rates are not capped
+                for line in reader.read_lines():
+                    if not line:
+                        continue
                     # Parse and send sensor data
                     sensor_data = parse_sensor_data(line)
                     if sensor_data:
-                        send_to_flask(sensor_data)
+                        sender.submit(sensor_data)
                     else:
                         # Print other serial output for debugging
                         if not line.startswith('SENSOR_DATA:'):
                             print(f"ESP32: {line}")
                 
-                time.sleep(0.1)  # Small delay to prevent excessive CPU usage
+                if args.stats_interval and time.monotonic() - last_stats >= args.stats_interval:
+                    print(sender.format_metrics())
+                    last_stats = time.monotonic()
                 
             except KeyboardInterrupt:
                 print("\n\nStopping serial reader...")
@@ -109,6 +139,8 @@ def main():
         sys.exit(1)
     
     finally:
+        sender.stop()
+        print(sender.format_metrics())
         if 'ser' in locals():
             ser.close()
             print("Serial connection closed")
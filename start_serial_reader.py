@@ -4,66 +4,45 @@ Start serial reader for ESP32 - run this manually
 """
 
 import serial
-import requests
 import time
 import sys
+from sensor_sender import SensorSender
+from serial_reader import READ_TIMEOUT, SerialLineReader, parse_sensor_data
 
 def start_serial_reader():
     print("🔌 Starting ESP32 Serial Reader")
     print("=" * 50)
     
+    sender = SensorSender().start()
+    
     try:
         # Connect to ESP32
-        ser = serial.Serial('COM11', 115200, timeout=1)
+        ser = serial.Serial('COM11', 115200, timeout=READ_TIMEOUT)
+        reader = SerialLineReader(ser)
         print("✅ Connected to ESP32 on COM11")
         print("📡 Reading sensor data...")
         print("Press Ctrl+C to stop\n")
         
         while True:
             try:
-                if ser.in_waiting > 0:
-                    line = ser.readline().decode('utf-8', errors='ignore').strip()
-                    if line:
-                        print(f"📨 {line}")
+                # Blocks until bytes arrive, then handles every complete line
+                for line in reader.read_lines():
+                    if not line:
+                        continue
+                    print(f"📨 {line}")
+                    
+                    # Check for sensor data
+                    sensor_data = parse_sensor_data(line)
+                    if sensor_data:
+                        print("📊 Sending to Flask:")
+                        for key, value in sensor_data.items():
+                            print(f"  {key}: {value}")
                         
-                        # Check for sensor data
-                        if line.startswith('SENSOR_DATA:'):
-                            print("🎯 Processing sensor data...")
-                            
-                            # Parse the data
-                            data_str = line.replace('SENSOR_DATA:', '')
-                            values = data_str.split(',')
-                            
-                            if len(values) == 8:
-                                sensor_data = {
-                                    'heart_rate': int(float(values[0])),
-                                    'spo2': int(float(values[1])),
-                                    'body_temperature': float(values[2]),
-                                    'environment_temperature': float(values[3]),
-                                    'humidity': float(values[4]),
-                                    'distance': float(values[5]),
-                                    'weight': float(values[6]),
-                                    'timestamp': int(values[7])
-                                }
-                                
-                                print("📊 Sending to Flask:")
-                                for key, value in sensor_data.items():
-                                    print(f"  {key}: {value}")
-                                
-                                # Send to Flask
-                                try:
-                                    response = requests.post('http://localhost:5000/sensor-data', 
-                                                           json=sensor_data, timeout=2)
-                                    if response.status_code == 200:
-                                        print("✅ Data sent to Flask successfully!")
-                                    else:
-                                        print(f"❌ Flask error: {response.status_code}")
-                                except Exception as e:
-                                    print(f"❌ Flask error: {e}")
-                                
-                                print("-" * 40)
-                
-                time.sleep(0.1)
+                        # Queue for Flask; the sender posts in the background
+                        if not sender.submit(sensor_data):
+                            print("⚠️ Send queue full, reading dropped")
+                        
+                        print("-" * 40)
                 
             except KeyboardInterrupt:
                 print("\n🛑 Stopping serial reader...")
@@ -73,6 +52,8 @@ def start_serial_reader():
                 time.sleep(1)
         
         ser.close()
+        sender.stop()
+        print(sender.format_metrics())
         print("🔌 Serial reader stopped")
         
     except serial.SerialException as e:
@@ -31,7 +31,10 @@
     }
 
     function stopSpeaking() {
-        if (currentSpeech && 'speechSynthesis' in window) {
+        if (currentSpeech && currentSpeech.source === 'backend') {
+            fetch('/speak/stop', { method: 'POST' }).catch(() => {});
+            currentSpeech = null;
+        } else if (currentSpeech && 'speechSynthesis' in window) {
             window.speechSynthesis.cancel();
             currentSpeech = null;
         }
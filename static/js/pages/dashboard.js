@@ -1,12 +1,21 @@
 // Dashboard page logic: list, search, edit, delete patients
 (function(){
-  function renderTable(tbody, data) {
-    tbody.innerHTML = '';
+  const PAGE_SIZE = 100;
+  // Only the columns renderTable shows
+  const LIST_FIELDS = [
+    'id', 'photoFilename', 'name', 'age', 'gender', 'contact', 'address',
+    'chiefComplaint', 'painLevel', 'painDescription', 'additionalSymptoms', 'medicalHistory',
+    'emergencyName', 'emergencyRelation', 'emergencyGender', 'emergencyContact', 'emergencyAddress',
+    'heart_rate', 'spo2', 'body_temperature', 'environment_temperature'
+  ].join(',');
+
+  function renderTable(tbody, data, append) {
+    if (!append) tbody.innerHTML = '';
     data.forEach(patient => {
       const row = document.createElement('tr');
       row.setAttribute('data-id', patient.id);
       row.innerHTML = `
-        <td><img class="patient-photo" src="/static/uploads/${patient.photoFilename || 'default.jpg'}" alt="Photo"></td>
+        <td><img class="patient-photo" src="${patient.photoFilename ? `/thumbnail/${encodeURIComponent(patient.photoFilename)}?w=120` : '/static/uploads/default.jpg'}" alt="Photo"></td>
         <td>${patient.name || ''}</td>
         <td>${patient.age || ''}</td>
         <td>${patient.gender || ''}</td>
@@ -99,44 +108,64 @@
   }
 
   let patientsData = [];
+  let nextCursor = null;
+
+  function updateLoadMore() {
+    const btn = document.getElementById('loadMoreBtn');
+    if (btn) btn.style.display = nextCursor ? '' : 'none';
+  }
 
-  function loadPatients() {
+  // Newest first, one keyset page at a time; pass append=true to fetch the next page
+  function loadPatients(append) {
     const tbody = document.querySelector('#patientTable tbody');
     if (!tbody) return;
-    tbody.innerHTML = '';
-    fetch('/patients')
-      .then(res => { if (!res.ok) throw new Error('Network response was not OK'); return res.json(); })
-      .then(data => { patientsData = data; renderTable(tbody, data); })
+    if (!append) { tbody.innerHTML = ''; patientsData = []; nextCursor = null; }
+    const params = new URLSearchParams({ fields: LIST_FIELDS, limit: PAGE_SIZE, order: 'desc' });
+    if (append && nextCursor) params.set('cursor', nextCursor);
+    fetch(`/patients?${params}`)
+      .then(res => {
+        if (!res.ok) throw new Error('Network response was not OK');
+        nextCursor = res.headers.get('X-Next-Cursor');
+        return res.json();
+      })
+      .then(data => { patientsData = patientsData.concat(data); renderTable(tbody, data, append); updateLoadMore(); })
       .catch(() => { tbody.innerHTML = '<tr><td colspan="21">Error loading data</td></tr>'; });
   }
 
+  // Server-side search (indexed name/contact prefix + full-text complaint/symptoms/history)
   function attachSearch() {
     const searchInput = document.getElementById('searchInput');
     const tbody = document.querySelector('#patientTable tbody');
     if (!searchInput || !tbody) return;
+    let timer = null;
+    let controller = null;
     searchInput.addEventListener('input', () => {
-      const filter = searchInput.value.toLowerCase();
-      const filtered = patientsData.filter(patient =>
-        (patient.name && patient.name.toLowerCase().includes(filter)) ||
-        (patient.age && String(patient.age).includes(filter)) ||
-        (patient.chiefComplaint && patient.chiefComplaint.toLowerCase().includes(filter))
-      );
-      renderTable(tbody, filtered);
+      clearTimeout(timer);
+      timer = setTimeout(() => {
+        if (controller) controller.abort();
+        const query = searchInput.value.trim();
+        if (!query) { controller = null; loadPatients(); return; }
+        controller = new AbortController();
+        const params = new URLSearchParams({ q: query, fields: LIST_FIELDS, limit: PAGE_SIZE });
+        fetch(`/patients/search?${params}`, { signal: controller.signal })
+          .then(res => { if (!res.ok) throw new Error('Search failed'); return res.json(); })
+          .then(data => { patientsData = data; nextCursor = null; renderTable(tbody, data); updateLoadMore(); })
+          .catch(err => { if (err.name !== 'AbortError') tbody.innerHTML = '<tr><td colspan="21">Error searching</td></tr>'; });
+      }, 250);
     });
   }
 
   function attachExport() {
+    // Navigate instead of fetch+blob so the browser streams the download to disk
     window.exportCSV = function(){
-      fetch('/export_csv')
-        .then(r => { if (!r.ok) throw new Error('Failed to export CSV'); return r.blob(); })
-        .then(blob => { const url = window.URL.createObjectURL(blob); const a = document.createElement('a'); a.href = url; a.download = 'patients.csv'; document.body.appendChild(a); a.click(); document.body.removeChild(a); window.URL.revokeObjectURL(url); })
-        .catch(() => alert('Export failed.'));
+      window.location.href = '/export_csv?vitals=1';
     };
   }
 
   window.addEventListener('DOMContentLoaded', () => {
     if (!document.getElementById('patientTable')) return;
     loadPatients();
+    document.getElementById('loadMoreBtn')?.addEventListener('click', () => loadPatients(true));
     attachSearch();
     attachRowHandlers(document.querySelector('#patientTable tbody'));
     attachExport();
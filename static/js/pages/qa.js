@@ -64,17 +64,82 @@
     { prompt: "और उनका पता?", field: "emergencyAddress" }
   ];
 
+  const messages = {
+    en: {
+      retry: "I didn't catch that. Could you please repeat?",
+      sensor: 'Please place your hand on the sensor now.',
+      done: 'Registration complete. Now I will take your picture.'
+    },
+    hi: {
+      retry: 'मुझे समझ नहीं आया, कृपया दोहराएँ।',
+      sensor: 'कृपया अब सेंसर पर अपना हाथ रखें।',
+      done: 'पंजीकरण पूरा हुआ। अब मैं आपकी फोटो लूँगा।'
+    }
+  };
+
   function getActiveQuestions() {
     const lang = sessionStorage.getItem('qa_lang') || 'en';
     return (lang === 'hi') ? questions_hi : questions_en;
   }
 
+  function getMessages() {
+    return messages[sessionStorage.getItem('qa_lang') || 'en'] || messages.en;
+  }
+
+  // Fixed phrase -> URL of its pre-rendered recording on the server
+  let promptAudio = {};
+
+  // Phrases not rendered yet are queued on the server; check back for them a few times
+  const PROMPT_AUDIO_POLLS = 5;
+  const PROMPT_AUDIO_POLL_MS = 4000;
+
+  function loadPromptAudio(polls) {
+    const lang = sessionStorage.getItem('qa_lang') || 'en';
+    const phrases = getActiveQuestions().map(q => q.prompt).concat(Object.values(getMessages()));
+    if (polls === undefined) { polls = PROMPT_AUDIO_POLLS; promptAudio = {}; }
+    const wanted = phrases.filter(p => !promptAudio[p]);
+    return fetch('/prompt_audio/batch', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ phrases: wanted, lang: lang })
+    })
+      .then(res => res.ok ? res.json() : {})
+      .then(data => {
+        Object.entries((data && data.audio) || {}).forEach(([phrase, url]) => {
+          if (!url) return;
+          promptAudio[phrase] = url;
+          // Warm the browser cache so the first play starts immediately
+          new Audio(url).preload = 'auto';
+        });
+        if (data && data.pending > 0 && polls > 0) {
+          setTimeout(() => loadPromptAudio(polls - 1), PROMPT_AUDIO_POLL_MS);
+        }
+      })
+      .catch(() => {});
+  }
+
   function setDisplayIfExists(elementId, text) {
     const el = document.getElementById(elementId);
     if (el) el.innerText = text;
   }
 
   function speakChunked(text, callback) {
+    const url = promptAudio[text];
+    if (!url) { speakWithBrowser(text, callback); return; }
+    const audio = new Audio(url);
+    let done = false;
+    const finish = fallback => {
+      if (done) return;
+      done = true;
+      if (fallback) speakWithBrowser(text, callback);
+      else if (callback) callback();
+    };
+    audio.onended = () => finish(false);
+    audio.onerror = () => finish(true);
+    audio.play().catch(() => finish(true));
+  }
+
+  function speakWithBrowser(text, callback) {
     const chunks = text.match(/[^.!?]+[.!?]*/g) || [text];
     let i = 0;
     (function next(){
@@ -123,20 +188,14 @@
               index++;
               ask();
             },
-            () => {
-              const lang = sessionStorage.getItem('qa_lang') || 'en';
-              const retry = (lang === 'hi') ? 'मुझे समझ नहीं आया, कृपया दोहराएँ।' : "I didn't catch that. Could you please repeat?";
-              speakChunked(retry, () => ask());
-            }
+            () => speakChunked(getMessages().retry, () => ask())
           );
         }, 100);
       });
     } else {
-      const lang = sessionStorage.getItem('qa_lang') || 'en';
-      const msg1 = (lang === 'hi') ? 'कृपया अब सेंसर पर अपना हाथ रखें।' : 'Please place your hand on the sensor now.';
-      const msg2 = (lang === 'hi') ? 'पंजीकरण पूरा हुआ। अब मैं आपकी फोटो लूँगा।' : 'Registration complete. Now I will take your picture.';
-      speakChunked(msg1, () => {
-        speakChunked(msg2, () => { captureAndSubmit(); });
+      const msg = getMessages();
+      speakChunked(msg.sensor, () => {
+        speakChunked(msg.done, () => { captureAndSubmit(); });
       });
     }
   }
@@ -155,6 +214,8 @@
   window.start = function () {
     index = 0;
     window.interviewStarted = true;
+    // Don't hold the first question for rendering; phrases without audio yet are spoken by the browser
+    loadPromptAudio();
     ask();
   };
 })();